@@ -0,0 +1,169 @@
+import itertools
+import sys
+
+import numpy as np
+
+from gait_engine import GaitMechanism
+from kinematics import ik_batch
+
+
+"""Per-robot parameters, in the order of WalkingMechanism.gait_key"""
+CONFIG_FIELDS = ("arm1", "arm2", "pivotX", "pivotY", "x0", "y0", "step_length", "lift_ratio",
+                 "swing_steps", "stance_steps", "bob")
+
+
+"""Configurations of a number of robots, every field broadcast to one [robots] array"""
+def make_configs(**fields):
+    missing = set(CONFIG_FIELDS) - set(fields)
+    if missing:
+        raise ValueError(f"missing configuration fields: {', '.join(sorted(missing))}")
+
+    values = np.broadcast_arrays(*(np.atleast_1d(fields[name]) for name in CONFIG_FIELDS))
+    configs = {name: np.array(value, dtype=float) for name, value in zip(CONFIG_FIELDS, values)}
+    for name in ("swing_steps", "stance_steps"):
+        configs[name] = configs[name].astype(int)
+        if (configs[name] < 2).any():
+            raise ValueError(f"{name} must be at least 2")
+    return configs
+
+
+"""Every combination of the given values, fields given as scalars stay fixed"""
+def grid(**fields):
+    names = list(fields)
+    combos = list(itertools.product(*(np.atleast_1d(fields[name]) for name in names)))
+    return make_configs(**{name: [combo[i] for combo in combos] for i, name in enumerate(names)})
+
+
+"""Configuration of one of the scripts' legs, e.g. from_leg(simple_crawling.WalkingMechanism(...))"""
+def from_leg(leg):
+    return dict(zip(CONFIG_FIELDS, leg.gait_key()))
+
+
+"""Foot targets of one gait cycle for every robot
+
+The gait the robot runs: GaitMechanism.from_gait(gait) sampled once per
+tick, with the gait's own offsets and swing phase. Each swing lasts
+swing_steps ticks, so a cycle lasts swing_steps / swing_phase ticks and the
+phase clock runs it with clock = cycle / rate. The default wave gait is the
+compiled table of LegMovement.gait_cycle, which gives the stance the
+remaining ticks whatever stance_steps is. Robots with shorter cycles are
+padded, valid marks the real ticks. Returns footX, footY, valid, swinging
+and the swing or stance progress, all of shape [robots, legs, steps].
+"""
+def gait_cycles(configs, legs=4, gait="wave"):
+    mechanism = GaitMechanism.from_gait(gait, clock=1.0, legs=legs)
+    ticks = np.round(configs["swing_steps"] / mechanism.swing_phase).astype(int)[:, None, None]
+    k = np.arange(ticks.max())
+    valid = np.broadcast_to(k < ticks, (len(ticks), legs, len(k)))
+
+    phase, offsets = k / ticks, mechanism.offsets[None, :, None]
+    swinging, progress = mechanism.leg_progress(phase, offsets)
+    c = {name: value[:, None, None] for name, value in configs.items()}
+    footX, footY = mechanism.sample(c["x0"], c["y0"], c["step_length"], c["lift_ratio"], c["bob"], phase, offsets)
+    return footX, footY, valid, swinging, progress
+
+
+class BatchResult:
+    """Gait cycles and joint state of a batch of robots, all of shape [robots, legs, steps].
+
+    Padded ticks of shorter cycles are NaN in the joint arrays. unreachable
+    marks the targets IK had to clamp onto the reach circle. The cycle loops,
+    tick t is followed by tick next[t], and smooth marks the ticks whose next
+    tick is still in the same swing or stance, the joints turn sharply where
+    one curve hands over to the other.
+    """
+
+    def __init__(self, configs, footX, footY, valid, swinging, progress, rate):
+        self.configs = configs
+        self.footX, self.footY, self.valid = footX, footY, valid
+        self.swinging, self.progress = swinging, progress
+        self.rate = rate
+
+        c = {name: value[:, None, None] for name, value in configs.items()}
+        reach = np.hypot(footX - c["pivotX"], footY - c["pivotY"])
+        self.unreachable = (reach > c["arm1"] + c["arm2"]) & valid
+
+        joints = ik_batch(footX, footY, c["pivotX"], c["pivotY"], c["arm1"], c["arm2"])
+        self.alpha, self.beta, self.elbowX, self.elbowY, self.wristX, self.wristY = (
+            np.where(valid, joint, np.nan) for joint in joints)
+
+        ticks = valid.sum(axis=-1, keepdims=True)
+        self.next = (np.arange(valid.shape[-1]) + 1) % ticks
+        self.smooth = valid & (self.shift(swinging) == swinging) & (self.shift(progress) > progress)
+
+    def __len__(self):
+        return len(self.footX)
+
+
+    """Values at the next tick of the cycle"""
+    def shift(self, values):
+        return np.take_along_axis(values, self.next, axis=-1)
+
+
+    """Joint speed from each tick to the next in rad/s, NaN at padding and swing/stance handovers"""
+    def velocity(self, angle):
+        return np.where(self.smooth, (self.shift(angle) - angle) * self.rate, np.nan)
+
+
+    """Joint acceleration in rad/s^2, the three ticks it spans must lie in one swing or stance"""
+    def acceleration(self, angle):
+        following = self.shift(angle)
+        return np.where(self.smooth & self.shift(self.smooth),
+                        (self.shift(following) - 2 * following + angle) * self.rate**2, np.nan)
+
+
+    """Body speed in mm/s for every robot, how fast the feet on the ground actually move back
+    times the share of the cycle they spend there, one step length per cycle when nothing is clamped"""
+    def speed(self):
+        stance = self.valid & ~self.swinging
+        moved = np.where(stance & self.smooth, self.wristX - self.shift(self.wristX), np.nan)
+        return np.nanmean(moved, axis=(1, 2)) * self.rate * stance.sum(axis=(1, 2)) / self.valid.sum(axis=(1, 2))
+
+
+    """Per-robot report, every value a [robots] array"""
+    def summary(self):
+        report = {name: self.configs[name] for name in CONFIG_FIELDS}
+        report["violations"] = self.unreachable.sum(axis=(1, 2))
+        report["speed"] = self.speed()
+        report["clock"] = self.valid[:, 0].sum(axis=-1) / self.rate
+        # Fewest feet on the ground at any tick, and how high the swinging feet lift off it
+        on_ground = np.where(self.valid[:, 0], (~self.swinging).sum(axis=1), self.swinging.shape[1])
+        report["support"] = on_ground.min(axis=-1)
+        lift = np.where(self.swinging & self.valid, self.footY - self.configs["y0"][:, None, None], np.nan)
+        report["clearance"] = np.nanmax(lift, axis=(1, 2))
+        for name in ("alpha", "beta"):
+            angle = getattr(self, name)
+            report[f"{name}_min"] = np.nanmin(angle, axis=(1, 2))
+            report[f"{name}_max"] = np.nanmax(angle, axis=(1, 2))
+            report[f"{name}_peak_velocity"] = np.nanmax(np.abs(self.velocity(angle)), axis=(1, 2))
+            report[f"{name}_peak_acceleration"] = np.nanmax(np.abs(self.acceleration(angle)), axis=(1, 2))
+        return report
+
+
+"""Simulating one gait cycle of every configuration at once, rate is the control frequency in Hz"""
+def simulate(configs, legs=4, rate=100, gait="wave"):
+    return BatchResult(configs, *gait_cycles(configs, legs, gait), rate)
+
+
+"""python batch_sim.py [crawling|walking], sweeps step length and lift ratio around a script's geometry"""
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "walking":
+        import simple_walking_mechanism_for_first as module
+    else:
+        import simple_crawling as module
+
+    base = from_leg(module.WalkingMechanism(module.LEG1, module.LEG2, module.PIVOTx, module.PIVOTy,
+                                            module.START, module.STEP_LENGTH))
+    base.update(step_length=module.STEP_LENGTH * np.linspace(0.5, 3, 6), lift_ratio=(0.25, 0.5, 1.0),
+                swing_steps=(20, 30))
+    report = simulate(grid(**base)).summary()
+
+    print(f"{'step':>6} {'lift':>5} {'swing':>5} {'clamped':>7} {'alpha deg':>15} {'beta deg':>15} "
+          f"{'peak deg/s':>15} {'mm/s':>6}")
+    for r in range(len(report["violations"])):
+        alpha = np.degrees((report["alpha_min"][r], report["alpha_max"][r]))
+        beta = np.degrees((report["beta_min"][r], report["beta_max"][r]))
+        peak = np.degrees((report["alpha_peak_velocity"][r], report["beta_peak_velocity"][r]))
+        print(f"{report['step_length'][r]:6.1f} {report['lift_ratio'][r]:5.2f} {report['swing_steps'][r]:5d} "
+              f"{report['violations'][r]:7d} {alpha[0]:7.1f}{alpha[1]:8.1f} {beta[0]:7.1f}{beta[1]:8.1f} "
+              f"{peak[0]:7.0f}{peak[1]:8.0f} {report['speed'][r]:6.1f}")
@@ -0,0 +1,228 @@
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import numpy as np
+
+import crawling_mechanism
+import ik2d
+import simple_crawling
+import simple_walking_mechanism_for_first as simple_walking
+from calibration import ServoCalibration
+from kinematics import VelocityIK, ik_batch
+from servo_protocol import encode_frame, encode_frames, encode_text
+from trajectory import Trajectory, stance_segment, swing_segment
+
+
+"""Benchmarks for every stage of the kinematics and gait pipeline
+
+    python benchmark.py                          run everything, JSON on stdout
+    python benchmark.py -o now.json -k ik        only cases containing "ik"
+    python benchmark.py --baseline base.json     compare, exit 1 on regressions
+
+Each case is timed with timeit: the call count is picked so one run lasts at
+least --min-time, and the best and median per-call times over --repeat runs
+are reported in microseconds. Both geometries are covered, the 40/40 crawling
+legs and the 100/156 walking legs.
+"""
+GEOMETRIES = {
+    "40x40": (simple_crawling, (0, 1, 1, 0)),
+    "100x156": (simple_walking, (0, 1, 1, 0)),
+}
+
+
+def make_legs(module, offsets):
+    return [module.WalkingMechanism(module.LEG1, module.LEG2, module.PIVOTx, module.PIVOTy,
+                                    module.START, module.STEP_LENGTH, offset=offset) for offset in offsets]
+
+
+"""Time and step length of a tick alternating between two step lengths, 13 ms apart"""
+def _toggle(lengths, tick):
+    return tick * 0.013, lengths[tick % 2]
+
+
+def trajectory_cases():
+    for name, (module, offsets) in GEOMETRIES.items():
+        leg = make_legs(module, offsets)[0]
+        for steps in (30, 120, 1000):
+            yield f"trajectory/cycloidal_between/{name}/{steps}", lambda leg=leg, steps=steps: leg.cycloidal_between(steps)
+            yield f"trajectory/stance_phase_fixed_pivot/{name}/{steps}", lambda leg=leg, steps=steps: leg.stance_phase_fixed_pivot(steps)
+
+        movement = module.LegMovement(make_legs(module, offsets))
+        yield f"trajectory/gait_cycle/{name}", movement.gait_cycle
+
+        trajectory = leg.foot_trajectory()
+        for rate in (100, 1000):
+            yield (f"trajectory/Trajectory.at/{name}/{rate}Hz",
+                   lambda trajectory=trajectory, rate=rate: trajectory.at(np.arange(int(trajectory.duration * rate)) / rate))
+
+        # Mid-gait step length changes, blended replanning against regenerating and resampling the cycle
+        leg.foot_planner()
+        lengths, ticks = (leg.step_length, leg.step_length * 1.2), iter(range(sys.maxsize))
+        yield (f"trajectory/retarget/{name}",
+               lambda leg=leg, lengths=lengths, ticks=ticks: leg.retarget(*_toggle(lengths, next(ticks))))
+        yield (f"trajectory/regenerate/{name}",
+               lambda leg=leg: Trajectory([swing_segment(0.3, leg.x0, leg.y0, leg.step_length),
+                                           stance_segment(0.3, leg.x0, leg.y0, leg.step_length)]).resample(100))
+
+    leg = make_legs(crawling_mechanism, (0, 2, 1, 3))[0]
+    yield "trajectory/elliptical_path/40x40/32", leg.elliptical_path
+
+
+def ik_cases():
+    for name, (module, offsets) in GEOMETRIES.items():
+        legs = make_legs(module, offsets)
+        leg = legs[0]
+        x, y = leg.cycloidal_between()
+        yield f"ik/WalkingMechanism.ik/{name}/1", lambda leg=leg, x=x[10], y=y[10]: leg.ik(x, y, leg.pivotX, leg.pivotY)
+
+        for size in (1, 30, 120, 1200):
+            tx, ty = leg.cycloidal_between(size)
+            yield (f"ik/ik_batch/{name}/{size}",
+                   lambda leg=leg, tx=tx, ty=ty: ik_batch(tx, ty, leg.pivotX, leg.pivotY, leg.arm1, leg.arm2))
+
+        movement = module.LegMovement(legs)
+        footX, footY, pivotX, pivotY = movement.gait_cycle()
+        yield (f"ik/ik_batch/{name}/gait_cycle",
+               lambda: ik_batch(footX, footY, pivotX, pivotY, leg.arm1, leg.arm2))
+        yield f"ik/compile_gait/{name}", lambda movement=movement: recompile(movement)
+
+        # One tick of all legs at 1 kHz, full solve against Jacobian tracking
+        pX, pY = pivotX[:, 0], pivotY[:, 0]
+        ticks = iter(range(sys.maxsize))
+        yield (f"ik/ik_batch/{name}/tick",
+               lambda ticks=ticks: ik_batch(*_interpolated(footX, footY, next(ticks)), pX, pY, leg.arm1, leg.arm2))
+        tracker, ticks = VelocityIK(pX, pY, leg.arm1, leg.arm2), iter(range(sys.maxsize))
+        yield (f"ik/VelocityIK.step/{name}/tick",
+               lambda tracker=tracker, ticks=ticks: tracker.step(*_interpolated(footX, footY, next(ticks))))
+
+    yield "ik/ik2d.solve_ik/40x55/1", lambda: ik2d.solve_ik(120.0, 90.0)
+
+
+def format_cases():
+    legs = make_legs(simple_walking, (0, 1, 1, 0))
+    movement = simple_walking.LegMovement(legs)
+    table = movement.compile_gait()
+    commands = movement.command_table
+
+    yield "format/commands/gait_cycle", lambda: movement.commands(table.alpha, table.beta)
+    calibration = ServoCalibration(len(legs), offset=90, max_velocity=400)
+    yield "format/calibration.commands/gait_cycle", lambda: calibration.commands(table.alpha, table.beta)
+    yield "format/calibration.check/gait_cycle", lambda: calibration.check(table.alpha, table.beta, 100)
+    yield "format/encode_text/12", lambda: encode_text(commands[0])
+    yield "format/encode_frame/12", lambda: encode_frame(commands[0], 7)
+    yield f"format/encode_frames/{len(commands)}x12", lambda: encode_frames(commands)
+
+
+def render_cases():
+    try:
+        import matplotlib
+    except ImportError:
+        return
+    matplotlib.use("Agg")
+    from visualizer import LegVisualizer
+
+    legs = make_legs(simple_crawling, (0, 1, 1, 0))
+    table = simple_crawling.LegMovement(legs).compile_gait()
+
+    for readout in (True, False):
+        visualizer = LegVisualizer(readout=readout)
+        visualizer.fig.canvas.draw()
+        ticks = iter(range(sys.maxsize))
+        yield (f"render/LegVisualizer.update/readout={readout}",
+               lambda visualizer=visualizer, ticks=ticks: visualizer.update(*_frame(table, next(ticks))))
+
+    demo = ik2d.IKSliderDemo()
+    demo.fig.canvas.draw()
+    yield "render/ik2d.apply_ik", lambda: demo.apply_ik(120.0, 90.0)
+
+
+def recompile(movement):
+    movement.gait_table = None
+    return movement.compile_gait()
+
+
+"""Targets of all legs between two gait table ticks, ten substeps per tick"""
+def _interpolated(footX, footY, substep):
+    i, s = divmod(substep % (footX.shape[1] * 10), 10)
+    j = (i + 1) % footX.shape[1]
+    return (footX[:, i] + (footX[:, j] - footX[:, i]) * s / 10,
+            footY[:, i] + (footY[:, j] - footY[:, i]) * s / 10)
+
+
+def _frame(table, tick):
+    i = tick % len(table)
+    return table.frames[i], table.pivots[i]
+
+
+STAGES = {
+    "trajectory": trajectory_cases,
+    "ik": ik_cases,
+    "format": format_cases,
+    "render": render_cases,
+}
+
+
+def measure(fn, min_time, repeat):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    times = np.array(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+    return {"best_us": float(times.min()), "median_us": float(np.median(times)), "calls": number * repeat}
+
+
+def run(keyword=None, min_time=0.2, repeat=5):
+    results = {}
+    for stage in STAGES.values():
+        for name, fn in stage():
+            if keyword is None or keyword in name:
+                results[name] = measure(fn, min_time, repeat)
+                print(f"{name:60s} {results[name]['best_us']:12.2f} us", file=sys.stderr)
+
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine()},
+        "results": results,
+    }
+
+
+"""Ratio of current to baseline best time per case, cases over tolerance are regressions"""
+def compare(current, baseline, tolerance=1.25):
+    comparison, regressions = {}, []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["best_us"] / baseline["results"][name]["best_us"]
+        comparison[name] = ratio
+        if ratio > tolerance:
+            regressions.append(name)
+    return comparison, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each stage of the gait pipeline")
+    parser.add_argument("-k", "--keyword", help="only run cases whose name contains this")
+    parser.add_argument("-o", "--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = run(args.keyword, args.min_time, args.repeat)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"], regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    for name in regressions:
+        print(f"REGRESSION {name}: {report['comparison'][name]:.2f}x baseline", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,108 @@
+import json
+import sys
+
+import numpy as np
+
+
+"""Joints per leg in the servo frames, alpha, beta and the unused third joint"""
+JOINTS_PER_LEG = 3
+CALIBRATION_FIELDS = ("offset", "direction", "lower", "upper", "max_velocity", "pulse_min", "pulse_max", "servo_range")
+
+
+class ServoCalibration:
+    """Per-servo lookup tables applied to whole arrays of joint angles.
+
+    Every field is a [legs, 3] array indexed by leg and joint, joint 0 is
+    alpha, 1 is beta and 2 the unused third joint, in degrees:
+
+        offset        servo reading at joint angle 0
+        direction     +1 or -1, servos mounted mirrored turn the other way
+        lower, upper  joint limits, in joint angles before offset and direction
+        max_velocity  degrees per second the servo can follow
+        pulse_min/max PWM pulse width in microseconds at 0 and servo_range degrees
+
+    commands() turns [..., legs] alpha and beta in radians into [..., legs * 3]
+    whole servo degrees, the layout LegMovement.commands sends, and
+    validate() checks a compiled gait cycle once before it is streamed.
+    """
+
+    def __init__(self, legs, **fields):
+        unknown = set(fields) - set(CALIBRATION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown calibration fields {sorted(unknown)}")
+
+        defaults = dict(offset=0.0, direction=1.0, lower=-180.0, upper=180.0, max_velocity=np.inf,
+                        pulse_min=500.0, pulse_max=2500.0, servo_range=180.0)
+        self.legs = legs
+        for name in CALIBRATION_FIELDS:
+            value = np.array(np.broadcast_to(np.asarray(fields.get(name, defaults[name]), dtype=float),
+                                             (legs, JOINTS_PER_LEG)))
+            setattr(self, name, value)
+        if not np.all(np.abs(self.direction) == 1):
+            raise ValueError("direction must be +1 or -1 for every joint")
+        if np.any(self.lower > self.upper):
+            raise ValueError("lower joint limits must not exceed the upper ones")
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.pop("legs"), **data)
+
+    def save(self, path):
+        data = {name: getattr(self, name).tolist() for name in CALIBRATION_FIELDS}
+        with open(path, "w") as f:
+            json.dump(dict(legs=self.legs, **data), f, indent=1)
+
+
+    """Joint angles in degrees, [..., legs, 3], the third joint is always 0"""
+    def joint_degrees(self, alpha, beta):
+        alpha = np.asarray(alpha, dtype=float)
+        joints = np.zeros(alpha.shape + (JOINTS_PER_LEG,))
+        joints[..., 0] = np.rad2deg(alpha)
+        joints[..., 1] = np.rad2deg(beta)
+        return joints
+
+    """Servo degrees of joint angles in degrees, kept inside the joint limits as a last safeguard"""
+    def servo_degrees(self, joints):
+        return self.direction * np.clip(joints, self.lower, self.upper) + self.offset
+
+    def commands(self, alpha, beta):
+        # Truncated like LegMovement.commands, so a neutral calibration sends the same frames
+        servo = self.servo_degrees(self.joint_degrees(alpha, beta)).astype(int)
+        return servo.reshape(servo.shape[:-2] + (-1,))
+
+    """PWM pulse widths in microseconds of [..., legs * 3] servo degrees"""
+    def pulse_widths(self, servo):
+        servo = np.asarray(servo, dtype=float).reshape(np.shape(servo)[:-1] + (self.legs, JOINTS_PER_LEG))
+        widths = self.pulse_min + (self.pulse_max - self.pulse_min) * servo / self.servo_range
+        return widths.reshape(widths.shape[:-2] + (-1,))
+
+
+    """Every joint limit and velocity violation of a gait cycle, alpha and beta are [ticks, legs] in radians.
+    The cycle loops, so the step from the last tick back to the first counts too."""
+    def check(self, alpha, beta, rate):
+        joints = self.joint_degrees(alpha, beta)
+        velocity = np.abs(np.roll(joints, -1, axis=0) - joints) * rate
+
+        problems = []
+        for kind, mask in (("below lower limit", joints < self.lower), ("above upper limit", joints > self.upper),
+                           ("too fast", velocity > self.max_velocity)):
+            for tick, leg, joint in zip(*np.nonzero(mask)):
+                value = velocity[tick, leg, joint] if kind == "too fast" else joints[tick, leg, joint]
+                problems.append((kind, int(tick), int(leg), int(joint), float(value)))
+        return problems
+
+    """Raising ValueError before a gait that would drive a servo into its stops is streamed"""
+    def validate(self, alpha, beta, rate):
+        problems = self.check(alpha, beta, rate)
+        if problems:
+            shown = "; ".join(f"tick {tick} leg {leg} joint {joint} {kind} ({value:.1f})"
+                              for kind, tick, leg, joint, value in problems[:5])
+            more = f" and {len(problems) - 5} more" if len(problems) > 5 else ""
+            raise ValueError(f"Gait violates the servo calibration: {shown}{more}")
+
+
+"""python calibration.py legs path, writes a neutral calibration file to edit"""
+if __name__ == "__main__":
+    ServoCalibration(int(sys.argv[1])).save(sys.argv[2])
@@ -0,0 +1,177 @@
+import argparse
+import importlib
+import sys
+
+
+"""Running any gait on any leg geometry from one place
+
+    python cli.py                                    crawling legs, compiled gait, visual
+    python cli.py walking --gait trot --headless     100/156 legs on the phase clock, no matplotlib
+    python cli.py crawling --gait wave --legs 6      hexapod
+    python cli.py walking --gait trot --rate 1000 --velocity-ik
+    python cli.py elliptical --split                 drawing in a separate process
+    python cli.py walking --delta 50 --calibration servos.json
+    python cli.py walking --play out.gait            replaying a file from trajectory_file.py
+
+This is the only entry point, the leg scripts' own __main__ blocks call
+main() with their geometry. Only the modules the chosen run needs are
+imported: the geometry's script, and matplotlib or multiprocessing only in
+visual or split mode. The geometry presets are the leg scripts themselves,
+with their leg offsets and the servo frames they send by default. Servo
+frames go to stdout through a Transmitter, so a slow reader cannot stall
+the control loop.
+"""
+GEOMETRIES = {
+    "crawling": ("simple_crawling", (0, 1, 1, 0), None),
+    "walking": ("simple_walking_mechanism_for_first", (0, 1, 1, 0), "text"),
+    "elliptical": ("crawling_mechanism", (0, 2, 1, 3), None),
+}
+GAITS = ("table", "crawl", "trot", "pace", "bound", "wave")
+
+
+"""Legs of a geometry preset, more than four legs alternate their offsets"""
+def make_legs(module, offsets, legs=4):
+    offsets = offsets if legs == 4 else [i % 2 for i in range(legs)]
+    return [module.WalkingMechanism(module.LEG1, module.LEG2, module.PIVOTx, module.PIVOTy,
+                                    module.START, module.STEP_LENGTH, offset=offset) for offset in offsets]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a gait on one of the leg geometries")
+    parser.add_argument("geometry", nargs="?", default="crawling", choices=sorted(GEOMETRIES))
+    parser.add_argument("--gait", default="table", choices=GAITS,
+                        help="table replays the compiled gait, the others run on the phase clock")
+    parser.add_argument("--legs", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=100, help="control frequency in Hz")
+    parser.add_argument("--clock", type=float, default=1.2, help="phase clock gait cycle in seconds")
+    parser.add_argument("--velocity-ik", action="store_true",
+                        help="phase clock only, track the targets with the Jacobian instead of a full IK solve")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--headless", action="store_true", help="no drawing, matplotlib is never imported")
+    mode.add_argument("--split", action="store_true", help="draw in a separate process")
+    protocol = parser.add_mutually_exclusive_group()
+    protocol.add_argument("--text", dest="protocol", action="store_const", const="text",
+                          help="text servo frames, the walking geometry's default")
+    protocol.add_argument("--binary", dest="protocol", action="store_const", const="binary",
+                          help="binary servo frames")
+    protocol.add_argument("--delta", type=int, metavar="N",
+                          help="delta servo frames with a keyframe every N frames")
+    parser.add_argument("--calibration", metavar="PATH",
+                        help="servo calibration, python calibration.py 4 servos.json writes a neutral one")
+    parser.add_argument("--play", metavar="PATH", help="replay a gait file compiled by trajectory_file.py")
+    parser.add_argument("--profile", metavar="PATH", help="dump per-section loop timings here on exit")
+    parser.add_argument("--telemetry", metavar="PATH", help="record a telemetry log here")
+    args = parser.parse_args(argv)
+
+    if args.legs < 2:
+        parser.error("--legs needs at least 2 legs, one swings while the others stand")
+    if not 0 < args.rate < float("inf"):
+        parser.error("--rate must be a positive frequency in Hz")
+    if not 0 < args.clock < float("inf"):
+        parser.error("--clock must be a positive cycle time in seconds")
+    if args.delta is not None:
+        if args.delta < 1:
+            parser.error("--delta needs a keyframe interval of at least 1")
+        args.protocol = "delta"
+    elif args.protocol is None:
+        args.protocol = GEOMETRIES[args.geometry][2]
+    if args.play and args.gait != "table":
+        parser.error("--play replays the file's own gait, it does not take --gait")
+    if args.velocity_ik and args.gait == "table":
+        parser.error("--velocity-ik runs on the phase clock, the compiled table is solved once")
+    if args.play and args.telemetry:
+        parser.error("--play solves nothing, there is no telemetry to record")
+    if args.geometry == "elliptical" and (args.gait != "table" or args.legs != 4):
+        parser.error("the elliptical geometry only runs its compiled four-leg gait")
+    if args.gait not in ("table", "wave") and args.legs != 4:
+        parser.error(f"{args.gait} is defined for four legs, use --gait wave")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    module_name, offsets, _ = GEOMETRIES[args.geometry]
+    module = importlib.import_module(module_name)
+
+    playback = None
+    if args.play:
+        from trajectory_file import GaitPlayback
+
+        playback = GaitPlayback(args.play)
+    legs = make_legs(module, offsets, args.legs if playback is None else playback.legs)
+
+    visualizer_options = dict(shape=(-(-len(legs) // 2), 2))
+    if args.geometry == "walking":
+        visualizer_options.update(floor=-25, xlim=(-200, 200), ylim=(-200, 200))
+    elif args.geometry == "elliptical":
+        visualizer_options = dict(figsize=(12, 10), axes_order=((0, 1), (1, 1), (0, 0), (1, 0)))
+
+    calibration = None
+    if args.calibration:
+        from calibration import ServoCalibration
+
+        calibration = ServoCalibration.load(args.calibration)
+        if calibration.legs != len(legs):
+            raise SystemExit(f"{args.calibration} calibrates {calibration.legs} legs, this run has {len(legs)}")
+
+    visualizer, ring, transmitter, telemetry, profiler = None, None, None, None, None
+    if args.split:
+        # Drawing from shared memory in its own process, a slow redraw cannot stall the control loop.
+        # Imported here as multiprocessing is a noticeable part of the start-up time
+        from shared_state import JointRing, start_visualizer_process
+
+        ring = JointRing.create(legs=len(legs))
+        start_visualizer_process(ring, **visualizer_options)
+    elif not args.headless:
+        from visualizer import LegVisualizer
+
+        visualizer = LegVisualizer(**visualizer_options)
+    if args.protocol is not None:
+        from transmitter import Transmitter
+
+        transmitter = Transmitter(sys.stdout.buffer, policy="drop_oldest").start()
+    if args.telemetry:
+        from telemetry import TelemetryRecorder
+
+        telemetry = TelemetryRecorder(args.telemetry, legs=len(legs))
+    if args.profile:
+        from profiling import FrameProfiler, loop_sections
+
+        loop = "play" if playback is not None else "table" if args.gait == "table" else "phase_clock"
+        profiler = FrameProfiler(loop_sections(loop, telemetry is not None), dump_path=args.profile)
+
+    movement = module.LegMovement(legs, visualizer, frequency=args.rate, protocol=args.protocol, port=transmitter,
+                                  profiler=profiler, keyframe_interval=args.delta or 50, telemetry=telemetry,
+                                  calibration=calibration)
+    if ring is not None:
+        movement.subscribe(ring.publish)
+    try:
+        if playback is not None:
+            movement.play(playback)
+        elif args.gait == "table":
+            movement.start()
+        else:
+            from gait_engine import GaitMechanism
+
+            # 1.2 s per cycle by default matches the 120 ticks of the compiled crawl at 100 Hz
+            movement.start_phase_clock(GaitMechanism.from_gait(args.gait, clock=args.clock, legs=len(legs)),
+                                       velocity_ik=args.velocity_ik)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if ring is not None:
+            ring.close()
+        if telemetry is not None:
+            telemetry.close()
+        if transmitter is not None:
+            try:
+                transmitter.close()
+            finally:
+                # stdout carries the frames, so the report goes to stderr
+                stats = transmitter.stats()
+                print(f"servo frames: {stats['sent']} sent, {stats['dropped']} dropped, "
+                      f"{stats['blocked']} blocked, queue depth up to {stats['max_depth']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
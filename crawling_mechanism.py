@@ -1,17 +1,11 @@
-import numpy as np
-import matplotlib.pyplot as plt
-
+import sys
 
+import numpy as np
 
-class GaitMechanism:
-
-    def __init__(self, clock, swing_phase):
-        self.clock = clock
-        self.swing_phase = swing_phase
-        self.stance_phase = 1 - self.swing_phase
+import leg_movement
+from leg_movement import Leg
+from trajectory import Trajectory, elliptical_segment, line_segment
 
-    def get_current_phase(self):
-        pass
 
 
 LEG1 = 40
@@ -22,38 +16,19 @@ START = (50, 90)
 STEP_LENGTH = 20
 
 
-class WalkingMechanism:
+class WalkingMechanism(Leg):
 
-    def __init__(self, arm1, arm2, pivotX, pivotY, start, step_length, ax, fig, offset):
-        self.arm1 = arm1
-        self.arm2 = arm2
-        self.pivotX = pivotX
-        self.pivotY = pivotY
+    def __init__(self, arm1, arm2, pivotX, pivotY, start, step_length, ax=None, fig=None, offset=0):
+        super().__init__(arm1, arm2, pivotX, pivotY, ax, fig, offset)
         self.x1, self.y1 = start[0], start[1]
         self.step_lengthX = step_length
         self.step_lengthY = 10
-        self.ax = ax
-        self.is_animating = False
-        self.fig = fig
         self.swing_steps = 8
         self.stance_steps = 24
-        self.gait_cycle_len = self.swing_steps + self.stance_steps
-        self.offset = offset
-        self.current_phase = 0
 
-    def subplots(self, x, y, pX, pY):
-
-        self.ax.clear()
-        self.ax.plot([pX, self.elbowX], [pY, self.elbowY], 'ro-', linewidth=4, label='Arm')
-        self.ax.plot([self.elbowX, self.wristX], [self.elbowY, self.wristY], 'ro-', linewidth=4)
-        self.ax.plot(x, y, 'gx', markersize=10, label='Foot')
-        self.ax.text(0, 180, f"x: {x:.2f}, y: {y:.2f}\nα: {np.rad2deg(self.alpha):.1f}, β: {np.rad2deg(self.beta):.1f}")
-        self.ax.axhline(90, color='gray', linestyle='--')
-        self.ax.set_xlim(0, 200)
-        self.ax.set_ylim(0, 200)
-        self.ax.set_aspect('equal')
-        self.ax.legend()
-        self.fig.canvas.draw_idle()
+    @property
+    def gait_cycle_len(self):
+        return self.swing_steps + self.stance_steps
 
 
     
@@ -69,87 +44,44 @@ class WalkingMechanism:
         x = np.concatenate([swing_x, stance_x])
         y = np.concatenate([swing_y, stance_y])
 
-        print(x)
-
         return x, y
 
-    def ik(self, x, y, pX = 0, pY = 0):
-        dx, dy = x - pX, y - pY
-        b = np.hypot(dx, dy)
-        max_dist = self.arm1 + self.arm2
-
-        if b > max_dist:
-            x = pX + dx * max_dist / b
-            y = pY + dy * max_dist / b
-            dx, dy = x - pX, y - pY
-            b = max_dist
-
-        cos_beta = (b**2 - self.arm1**2 - self.arm2**2) / (2 * self.arm1 * self.arm2)
-        self.beta = np.arccos(np.clip(cos_beta, -1, 1))
-        k1 = self.arm1 + self.arm2 * np.cos(self.beta)
-        k2 = self.arm2 * np.sin(self.beta)
-        self.alpha = np.arctan2(dy, dx) - np.arctan2(k2, k1)
-
-        self.elbowX = pX + self.arm1 * np.cos(self.alpha)
-        self.elbowY = pY + self.arm1 * np.sin(self.alpha)
-        self.wristX = self.elbowX + self.arm2 * np.cos(self.alpha + self.beta)
-        self.wristY = self.elbowY + self.arm2 * np.sin(self.alpha + self.beta)
-
-        self.subplots(x, y, pX, pY)
-
-
-    def swing_phase(self):
-        swing_x, swing_y = self.cycloidal_between()
-
-        return swing_x, swing_y, self.pivotX, self.pivotY
-
-
-    def stance_phase(self):
-        stance_pivot_x, stance_pivot_y = self.stance_phase_fixed_pivot()
-        return stance_pivot_x, stance_pivot_y, self.pivotX, self.pivotY
-
-
-
-
-class LegMovement():
-
-    def __init__(self, legs):
-        self.legs = legs
-
-
-    def start(self):
-        steps = 0
-        while True:
-            
-            leg_trajectories = [leg.elliptical_path() for leg in self.legs]
-
-            leg_positions = []
-            for i, (x_path, y_path) in enumerate(leg_trajectories):
-                idx = (steps + self.legs[i].offset * self.legs[i].swing_steps) % self.legs[i].gait_cycle_len
-                leg_positions.append((x_path[idx], y_path[idx]))
-
-            for i in range(4):
-                x, y = leg_positions[i]
-                self.legs[i].ik(x, y, self.legs[i].pivotX, self.legs[i].pivotY)
-
-            plt.pause(0.01)
-            steps += 1
-
+    """elliptical_path as a Trajectory to resample at any rate, durations default to the step counts at 100 Hz"""
+    def foot_trajectory(self, swing_time=None, stance_time=None):
+        swing_time = self.swing_steps / 100 if swing_time is None else swing_time
+        stance_time = self.stance_steps / 100 if stance_time is None else stance_time
+        half = self.step_lengthX / 2
+        return self.cached_trajectory((self.gait_key(), swing_time, stance_time), lambda: Trajectory([
+            elliptical_segment(swing_time, self.x1, self.y1, self.step_lengthX, self.step_lengthY),
+            line_segment(stance_time, (self.x1 + half, self.y1), (self.x1 - half, self.y1))]))
 
+    """Everything the compiled gait table depends on"""
+    def gait_key(self):
+        return (self.arm1, self.arm2, self.pivotX, self.pivotY, self.x1, self.y1, self.step_lengthX,
+                self.step_lengthY, self.swing_steps, self.stance_steps, self.offset)
 
 
+class LegMovement(leg_movement.LegMovement):
+    """Legs on their elliptical paths, each a quarter cycle apart by its offset."""
 
+    """Every leg's elliptical path sampled at each step of one gait cycle"""
+    def gait_cycle(self):
+        steps = np.arange(np.lcm.reduce([leg.gait_cycle_len for leg in self.legs]))
 
-fig, ax = plt.subplots(2, 2, figsize = (12, 10))
-fig
-wm = [WalkingMechanism(LEG1, LEG2, PIVOTx, PIVOTy, START, STEP_LENGTH, ax[0][1], fig, 0),
-      WalkingMechanism(LEG1, LEG2, PIVOTx, PIVOTy, START, STEP_LENGTH, ax[1][1], fig, 2),
-      WalkingMechanism(LEG1, LEG2, PIVOTx, PIVOTy, START, STEP_LENGTH, ax[0][0], fig, 1),
-      WalkingMechanism(LEG1, LEG2, PIVOTx, PIVOTy, START, STEP_LENGTH, ax[1][0], fig, 3),
-    ]
+        footX, footY = [], []
+        for leg in self.legs:
+            x_path, y_path = leg.elliptical_path()
+            idx = (steps + leg.offset * leg.swing_steps) % leg.gait_cycle_len
+            footX.append(x_path[idx])
+            footY.append(y_path[idx])
 
+        pivotX = [[leg.pivotX] for leg in self.legs]
+        pivotY = [[leg.pivotY] for leg in self.legs]
+        return np.array(footX), np.array(footY), pivotX, pivotY
 
-Lm = LegMovement(wm)
-Lm.start()
 
+"""Same as python cli.py elliptical, with all of its options"""
+if __name__ == "__main__":
+    import cli
 
+    sys.exit(cli.main(["elliptical"] + sys.argv[1:]))
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+"""Phase offset of each leg and swing fraction of the cycle for the usual gaits.
+Legs are ordered as in the scripts, the diagonal pairs are (0, 3) and (1, 2).
+crawl is the sequence LegMovement.start steps through, one leg swinging at a time.
+"""
+GAITS = {
+    "crawl": ((0.0, 0.75, 0.5, 0.25), 0.25),
+    "trot": ((0.0, 0.5, 0.5, 0.0), 0.5),
+    "pace": ((0.0, 0.5, 0.0, 0.5), 0.5),
+    "bound": ((0.0, 0.0, 0.5, 0.5), 0.5),
+}
+
+
+"""Crawl generalised to any number of legs, leg i swings during the i-th slice of the cycle"""
+def wave_gait(legs):
+    return tuple((-np.arange(legs) / legs) % 1.0), 1.0 / legs
+
+
+"""Cyclodial swing, same curve as WalkingMechanism.cycloidal_between at progress s"""
+def swing_curve(s, x0, y0, step_length, lift_ratio=0.5):
+    x = x0 + step_length * (s - (1 / (2 * np.pi)) * np.sin(2 * np.pi * s))
+    y = y0 + lift_ratio * np.abs(step_length) * np.sin(np.pi * s)
+    return x, y
+
+
+"""Bobbing stance, same curve as WalkingMechanism.stance_phase_fixed_pivot at progress s"""
+def stance_curve(s, x0, y0, step_length, bob=3):
+    x = (1 - s) * (x0 + step_length) + s * x0
+    y = y0 + bob * np.sin(np.pi * s)
+    return x, y
+
+
+class GaitMechanism:
+    """Continuous phase clock driving every leg through swing and stance.
+
+    clock is the gait cycle period in seconds and swing_phase the fraction of
+    the cycle a leg spends in swing, so stance_phase is the duty factor. Each
+    leg runs at phase + its offset. The curves are analytic, so sampling any
+    phase costs the same whatever the control rate, and changing clock
+    between ticks changes speed without a jump in position.
+    """
+
+    def __init__(self, clock, swing_phase, offsets=GAITS["crawl"][0]):
+        if not 0 < swing_phase < 1:
+            raise ValueError(f"swing_phase must be between 0 and 1, got {swing_phase}")
+
+        self.clock = clock
+        self.swing_phase = swing_phase
+        self.stance_phase = 1 - self.swing_phase
+        self.offsets = np.asarray(offsets, dtype=float)
+        self.phase = 0.0
+
+    @classmethod
+    def from_gait(cls, name, clock, legs=4):
+        offsets, swing_phase = wave_gait(legs) if name == "wave" else GAITS[name]
+        if len(offsets) != legs:
+            raise ValueError(f"{name} is defined for {len(offsets)} legs, use 'wave' for {legs}")
+        return cls(clock, swing_phase, offsets)
+
+
+    def advance(self, dt):
+        self.phase = (self.phase + dt / self.clock) % 1.0
+        return self.phase
+
+
+    def get_current_phase(self, phase=None, offsets=None):
+        phase = self.phase if phase is None else phase
+        offsets = self.offsets if offsets is None else offsets
+        return (phase + offsets) % 1.0
+
+
+    """Which legs are swinging, and how far through its swing or stance each leg is, from 0 to 1"""
+    def leg_progress(self, phase=None, offsets=None):
+        leg_phase = self.get_current_phase(phase, offsets)
+        swinging = leg_phase < self.swing_phase
+        progress = np.where(swinging, leg_phase / self.swing_phase,
+                            (leg_phase - self.swing_phase) / self.stance_phase)
+        return swinging, progress
+
+
+    """Foot targets of every leg at the current phase, leg parameters may be per-leg arrays.
+    offsets overrides the gait's own, e.g. with the offsets kept in a LegArray."""
+    def sample(self, x0, y0, step_length, lift_ratio=0.5, bob=3, phase=None, offsets=None):
+        swinging, s = self.leg_progress(phase, offsets)
+        swing_x, swing_y = swing_curve(s, x0, y0, step_length, lift_ratio)
+        stance_x, stance_y = stance_curve(s, x0, y0, step_length, bob)
+        return np.where(swinging, swing_x, stance_x), np.where(swinging, swing_y, stance_y)
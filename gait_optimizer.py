@@ -0,0 +1,207 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from batch_sim import CONFIG_FIELDS, from_leg, make_configs, simulate
+
+
+"""Gait parameters the optimizer searches and their default (low, high) bounds.
+The stance takes the rest of the gait's cycle, so stance_steps is not searched"""
+SEARCH_BOUNDS = {
+    "step_length": (5.0, 60.0),
+    "lift_ratio": (0.1, 1.0),
+    "bob": (0.0, 6.0),
+    "swing_steps": (10, 60),
+}
+INTEGER_FIELDS = ("swing_steps", "stance_steps")
+
+
+"""Stable key of one evaluation, the same parameters always hash the same across runs"""
+def parameter_hash(config, legs, rate, gait="wave"):
+    canonical = {name: round(float(config[name]), 6) for name in CONFIG_FIELDS}
+    canonical.update(legs=legs, rate=rate, gait=gait)
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+"""Metrics of a chunk of candidates, run in the worker processes with one batch simulation"""
+def evaluate(candidates, legs=4, rate=100, gait="wave"):
+    configs = make_configs(**{name: [c[name] for c in candidates] for name in CONFIG_FIELDS})
+    report = simulate(configs, legs, rate, gait).summary()
+
+    speed = report["speed"]
+    peak_velocity = np.maximum(report["alpha_peak_velocity"], report["beta_peak_velocity"])
+    peak_acceleration = np.maximum(report["alpha_peak_acceleration"], report["beta_peak_acceleration"])
+
+    return [{"config": candidate, "violations": int(report["violations"][i]), "speed": float(speed[i]),
+             "clock": float(report["clock"][i]), "support": int(report["support"][i]),
+             "clearance": float(report["clearance"][i]),
+             "peak_velocity": float(peak_velocity[i]), "peak_acceleration": float(peak_acceleration[i])}
+            for i, candidate in enumerate(candidates)]
+
+
+"""Joint effort per mm/s of body speed. Unreachable gaits are infeasible, and so are gaits with fewer
+than min_support feet on the ground at any time or feet lifting less than min_clearance mm"""
+def cost(result, acceleration_weight=0.01, min_support=3, min_clearance=5.0):
+    if (result["violations"] > 0 or result["speed"] <= 0 or result["support"] < min_support
+            or result["clearance"] < min_clearance):
+        return np.inf
+    return (result["peak_velocity"] + acceleration_weight * result["peak_acceleration"]) / result["speed"]
+
+
+class ResultCache:
+    """Evaluations keyed by parameter hash, appended to a JSON lines file.
+
+    Every finished chunk is written and flushed straight away, so an
+    interrupted run loses at most the chunks still in flight and the next run
+    picks up from the file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.results = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.results[entry["hash"]] = entry
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, key):
+        return self.results[key]
+
+    def add(self, entries):
+        for entry in entries:
+            self.results[entry["hash"]] = entry
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+
+class GaitOptimizer:
+    """Searching the gait parameters of one leg geometry over a process pool.
+
+    Each round samples candidates around the best feasible gait so far, the
+    search box shrinking by shrink per round, and every candidate is scored by
+    cost(). Candidates are sent to the workers in chunks that each run as one
+    batch simulation, and results already in the cache are never evaluated
+    again. Sampling is seeded and only depends on the cached results, so a
+    resumed run regenerates the same candidates and skips the finished ones.
+    """
+
+    def __init__(self, base, bounds=None, legs=4, rate=100, cache_path=None, workers=None, chunk=64,
+                 acceleration_weight=0.01, seed=0, gait="wave", min_support=None, min_clearance=5.0):
+        self.base = dict(base)
+        self.bounds = dict(SEARCH_BOUNDS if bounds is None else bounds)
+        self.legs = legs
+        self.rate = rate
+        self.gait = gait
+        # Statically stable by default, one foot in the air at a time
+        self.min_support = legs - 1 if min_support is None else min_support
+        self.min_clearance = min_clearance
+        self.cache = ResultCache(cache_path)
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk = chunk
+        self.acceleration_weight = acceleration_weight
+        self.seed = seed
+        self.evaluated = 0
+
+
+    def sample(self, rng, samples, center=None, scale=1.0):
+        candidates = []
+        for _ in range(samples):
+            config = dict(self.base)
+            for name, (low, high) in self.bounds.items():
+                if center is None:
+                    value = rng.uniform(low, high)
+                else:
+                    value = np.clip(rng.normal(center[name], scale * (high - low) / 2), low, high)
+                config[name] = int(round(value)) if name in INTEGER_FIELDS else round(float(value), 3)
+            candidates.append(config)
+        return candidates
+
+
+    """Evaluating the candidates missing from the cache, spread over the pool"""
+    def evaluate(self, candidates, pool):
+        keyed = {parameter_hash(c, self.legs, self.rate, self.gait): c for c in candidates}
+        missing = [(key, c) for key, c in keyed.items() if key not in self.cache]
+
+        futures = {}
+        for start in range(0, len(missing), self.chunk):
+            keys, chunk = zip(*missing[start:start + self.chunk])
+            futures[pool.submit(evaluate, list(chunk), self.legs, self.rate, self.gait)] = keys
+
+        for future in as_completed(futures):
+            entries = [dict(result, hash=key) for key, result in zip(futures[future], future.result())]
+            self.cache.add(entries)
+            self.evaluated += len(entries)
+
+        return [self.cache[key] for key in keyed]
+
+
+    def cost(self, result):
+        return cost(result, self.acceleration_weight, self.min_support, self.min_clearance)
+
+
+    def best(self, results):
+        return min(results, key=self.cost)
+
+
+    def run(self, samples=256, rounds=4, shrink=0.5, verbose=True):
+        rng = np.random.default_rng(self.seed)
+        best, scale = None, 1.0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for r in range(rounds):
+                center = None if best is None or not np.isfinite(self.cost(best)) else best["config"]
+                results = self.evaluate(self.sample(rng, samples, center, scale), pool)
+                candidate = self.best(results)
+                if best is None or self.cost(candidate) < self.cost(best):
+                    best = candidate
+                scale *= shrink
+
+                if verbose:
+                    print(f"round {r}: cost {self.cost(best):.3f}, "
+                          f"{self.evaluated} evaluated, {len(self.cache)} cached", file=sys.stderr)
+        return best
+
+
+"""python gait_optimizer.py [crawling|walking] --cache runs.jsonl, rerunning the same command resumes"""
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search gait parameters for low joint velocity and acceleration")
+    parser.add_argument("geometry", nargs="?", default="crawling", choices=("crawling", "walking"))
+    parser.add_argument("--samples", type=int, default=256, help="candidates per round")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--cache", help="JSON lines file of finished evaluations, used to resume")
+    parser.add_argument("--workers", type=int, help="worker processes, all cores by default")
+    parser.add_argument("--rate", type=float, default=100, help="control frequency in Hz")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gait", default="wave", choices=("crawl", "trot", "pace", "bound", "wave"),
+                        help="the gait to tune, wave is the compiled table, the others python cli.py --gait")
+    parser.add_argument("--min-support", type=int, help="fewest feet on the ground, legs - 1 by default")
+    parser.add_argument("--min-clearance", type=float, default=5.0, help="lowest swing lift in mm")
+    args = parser.parse_args()
+
+    if args.geometry == "walking":
+        import simple_walking_mechanism_for_first as module
+    else:
+        import simple_crawling as module
+
+    leg = module.WalkingMechanism(module.LEG1, module.LEG2, module.PIVOTx, module.PIVOTy,
+                                  module.START, module.STEP_LENGTH)
+    optimizer = GaitOptimizer(from_leg(leg), rate=args.rate, cache_path=args.cache, workers=args.workers,
+                              seed=args.seed, gait=args.gait, min_support=args.min_support,
+                              min_clearance=args.min_clearance)
+    best = optimizer.run(args.samples, args.rounds)
+    json.dump(best, sys.stdout, indent=2)
+    print()
@@ -0,0 +1,60 @@
+import numpy as np
+
+from kinematics import clamp_to_reach, ik_batch
+
+
+JOINT_FIELDS = ("alpha", "beta", "elbowX", "elbowY", "wristX", "wristY")
+
+
+class GaitTable:
+    """Joint state of every leg at every phase index of one gait cycle.
+
+    Foot targets and pivots are [legs, ticks] arrays. IK is solved once here,
+    so the control loop only indexes frames[tick] of shape [legs, 6] with the
+    columns in JOINT_FIELDS order. targets, clamped and pivots are
+    [ticks, legs, 2], targets as requested and clamped after reach clamping.
+    key records the geometry it was built for.
+    """
+
+    def __init__(self, footX, footY, pivotX, pivotY, arm1, arm2, key=None):
+        footX, footY, pivotX, pivotY = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (footX, footY, pivotX, pivotY)))
+        arm1 = np.asarray(arm1, dtype=float).reshape(-1, 1)
+        arm2 = np.asarray(arm2, dtype=float).reshape(-1, 1)
+
+        solved = ik_batch(footX, footY, pivotX, pivotY, arm1, arm2)
+        self.arm1, self.arm2 = arm1, arm2
+        self.key = key
+        self.frames = np.ascontiguousarray(np.stack(solved, axis=-1).transpose(1, 0, 2))
+        self.targets = np.ascontiguousarray(np.stack([footX, footY], axis=-1).transpose(1, 0, 2))
+        self.pivots = np.ascontiguousarray(np.stack([pivotX, pivotY], axis=-1).transpose(1, 0, 2))
+        clampedX, clampedY = clamp_to_reach(footX, footY, pivotX, pivotY, arm1, arm2)[:2]
+        self.clamped = np.ascontiguousarray(np.stack([clampedX, clampedY], axis=-1).transpose(1, 0, 2))
+
+    def __len__(self):
+        return self.frames.shape[0]
+
+    @property
+    def alpha(self):
+        return self.frames[..., 0]
+
+    @property
+    def beta(self):
+        return self.frames[..., 1]
+
+    def frame(self, tick):
+        return self.frames[tick % len(self)]
+
+
+    """The same cycle in ticks frames instead of len(self), e.g. for another control rate. Targets and
+    pivots are interpolated around the loop and solved again"""
+    def resample(self, ticks):
+        if ticks == len(self):
+            return self
+        position = np.arange(ticks) * len(self) / ticks
+        i = position.astype(int)
+        f = (position - i)[:, None, None]
+        targets = (1 - f) * self.targets[i] + f * self.targets[(i + 1) % len(self)]
+        pivots = (1 - f) * self.pivots[i] + f * self.pivots[(i + 1) % len(self)]
+        return GaitTable(targets[..., 0].T, targets[..., 1].T, pivots[..., 0].T, pivots[..., 1].T,
+                         self.arm1, self.arm2, self.key)
@@ -1,71 +1,90 @@
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Slider
-
+import sys
 
-fig, ax = plt.subplots()
+import numpy as np
 
-fig.subplots_adjust(bottom = 0.25)
-axx = plt.axes([0.25, 0.15, 0.65, 0.03])
-axy = plt.axes([0.25, 0.1, 0.65, 0.03])
+from kinematics import clamp_to_reach, ik_batch
 
 
-x_slider = Slider(axx, "X", 0, 180, valinit=90)
-y_slider = Slider(axy, "Y", 0, 180, valinit=90)
+PIVOTx, PIVOTy = 60, 60
+LEG1, LEG2 = 40, 55
 
 
-def apply_ik(x, y):
+"""IK maths alone, apply_ik draws the result"""
+def solve_ik(x, y):
     
 
-    pivotX, pivotY = 60, 60
+    pivotX, pivotY = PIVOTx, PIVOTy
 
-    arm1, arm2 = 40, 55
+    arm1, arm2 = LEG1, LEG2
     # xlim, ylim = pivotX + arm1 + arm2, pivotY + arm1 +arm2
 
     # x, y = min(x, xlim), min(y, ylim)
 
-    max_dist = arm1 + arm2
-    dx, dy = x-pivotX, y - pivotY
+    x, y, *_ = clamp_to_reach(x, y, pivotX, pivotY, arm1, arm2)
+    # Mirrored elbow, beta comes back negative and is shown as the knee angle
+    alpha, beta, elbowX, elbowY, wristX, wristY = ik_batch(x, y, pivotX, pivotY, arm1, arm2, elbow=-1)
 
-    b = np.hypot(dx, dy)
-    if b>max_dist:
-        x = pivotX + dx * max_dist/b
-        y = pivotY + dy * max_dist/b
-    value_beta = (b**2 - arm1**2 - arm2**2)/(2*arm1*arm2)
-    beta = np.arccos(np.clip(value_beta, -1, 1))
-    alpha = np.arctan2((y-pivotY), (x-pivotX)) + np.arctan2(arm2 * np.sin(beta), arm2 * np.cos(beta) + arm1)
-    
-    elbowX = pivotX+arm1* np.cos(alpha)
-    elbowY = pivotY + arm1 * np.sin(alpha)
+    return x, y, pivotX, pivotY, alpha, -beta, elbowX, elbowY, wristX, wristY
 
-    wristX = elbowX + arm2 * np.cos(alpha - beta)
-    wristY = elbowY + arm2 * np.sin(alpha - beta)
 
-    ax.clear()
+class IKSliderDemo:
+    """Slider figure dragging the foot of a single leg.
 
-    ax.plot([pivotX, elbowX], [pivotY, elbowY], 'ro-', linewidth = 4)
-    ax.plot([elbowX, wristX], [elbowY, wristY], 'ro-', linewidth = 4)
-    ax.plot(x, y, 'gx', markersize =10)
+    matplotlib is only imported when the demo is created, so solve_ik can be
+    used without it. workspace=True shades the reachable area from the
+    cached WorkspaceMap, darker where the leg is close to fully extended or
+    folded.
+    """
 
-    ax.text(0, 180, f"x : {x:.2f}, y : {y:.2f}\nalpha : {np.rad2deg(alpha):.2f}, beta : {np.rad2deg(beta):.2f}")
-    ax.set_xlim(0, 200)
-    ax.set_ylim(0, 200)
-    ax.set_aspect('equal')
-    ax.legend()
-    fig.canvas.draw_idle()
-    
-    # print(alpha, beta)
+    def __init__(self, workspace=False):
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Slider
+
+        from visualizer import BlitManager, LegArtists
+
+        self.plt = plt
+        self.fig, self.ax = plt.subplots()
+
+        self.fig.subplots_adjust(bottom = 0.25)
+        axx = plt.axes([0.25, 0.15, 0.65, 0.03])
+        axy = plt.axes([0.25, 0.1, 0.65, 0.03])
+
+        self.x_slider = Slider(axx, "X", 0, 180, valinit=90)
+        self.y_slider = Slider(axy, "Y", 0, 180, valinit=90)
+
+        if workspace:
+            self.draw_workspace()
+        self.leg_artists = LegArtists(self.ax, floor=None)
+        self.blitter = BlitManager(self.fig.canvas, self.leg_artists.artists)
+
+        self.x_slider.on_changed(self.update)
+        self.y_slider.on_changed(self.update)
+        self.update(None)
+
+
+    def draw_workspace(self):
+        from workspace import WorkspaceMap
+
+        workspace = WorkspaceMap.load(LEG1, LEG2, elbow=-1)
+        self.ax.imshow(np.ma.masked_less(workspace.clearance, 0), origin="lower", cmap="Greens", alpha=0.35,
+                       extent=workspace.extent(PIVOTx, PIVOTy), zorder=0)
+
+
+    def apply_ik(self, x, y):
+        self.leg_artists.set(*solve_ik(x, y))
+        self.blitter.update()
 
+        # print(alpha, beta)
 
-def update(val):
-    x = x_slider.val
-    y = y_slider.val
 
-    apply_ik(x, y)
+    def update(self, val):
+        x = self.x_slider.val
+        y = self.y_slider.val
 
+        self.apply_ik(x, y)
 
-x_slider.on_changed(update)
-y_slider.on_changed(update)
 
-update(None)
-plt.show()
\ No newline at end of file
+"""python ik2d.py [--workspace]"""
+if __name__ == "__main__":
+    demo = IKSliderDemo(workspace="--workspace" in sys.argv)
+    demo.plt.show()
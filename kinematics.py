@@ -0,0 +1,200 @@
+import math
+
+import numpy as np
+
+
+_SCALAR_TYPES = (int, float, np.integer, np.floating)
+
+
+def _all_scalar(*values):
+    return all(isinstance(v, _SCALAR_TYPES) for v in values)
+
+
+"""Clamping a single target with math, returns plain floats"""
+def clamp_scalar(x, y, pX, pY, arm1, arm2):
+    dx, dy = x - pX, y - pY
+    b = math.hypot(dx, dy)
+    max_dist = arm1 + arm2
+
+    if b > max_dist:
+        x = pX + dx * max_dist / b
+        y = pY + dy * max_dist / b
+        dx, dy = x - pX, y - pY
+        b = max_dist
+
+    return float(x), float(y), float(dx), float(dy), float(b)
+
+
+"""Clamping unreachable targets onto the reach circle"""
+def clamp_to_reach(x, y, pX, pY, arm1, arm2):
+    if _all_scalar(x, y, pX, pY, arm1, arm2):
+        return clamp_scalar(x, y, pX, pY, arm1, arm2)
+
+    x, y, pX, pY, max_dist = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (x, y, pX, pY, np.add(arm1, arm2))))
+    dx, dy = x - pX, y - pY
+    b = np.hypot(dx, dy)
+
+    unreachable = b > max_dist
+    scale = np.divide(max_dist, b, out=np.ones_like(b), where=unreachable)
+    x = np.where(unreachable, pX + dx * scale, x)
+    y = np.where(unreachable, pY + dy * scale, y)
+    dx, dy = x - pX, y - pY
+    b = np.where(unreachable, max_dist, b)
+
+    return x, y, dx, dy, b
+
+
+"""Single target Inverse Kinematics with the math module
+
+NumPy spends more on per-call overhead than on the maths for a single
+target, so slider callbacks and per-tick control use this path. elbow=-1
+gives the mirrored solution, beta is then negative and the wrist is still
+at alpha + beta. Returns plain floats in radians.
+"""
+def ik_scalar(x, y, pX, pY, arm1, arm2, elbow=1):
+    x, y, dx, dy, b = clamp_scalar(x, y, pX, pY, arm1, arm2)
+
+    cos_beta = (b**2 - arm1**2 - arm2**2) / (2 * arm1 * arm2)
+    beta = elbow * math.acos(min(max(cos_beta, -1.0), 1.0))
+    k1 = arm1 + arm2 * math.cos(beta)
+    k2 = arm2 * math.sin(beta)
+    alpha = math.atan2(dy, dx) - math.atan2(k2, k1)
+
+    elbowX = pX + arm1 * math.cos(alpha)
+    elbowY = pY + arm1 * math.sin(alpha)
+    wristX = elbowX + arm2 * math.cos(alpha + beta)
+    wristY = elbowY + arm2 * math.sin(alpha + beta)
+
+    return alpha, beta, elbowX, elbowY, wristX, wristY
+
+
+"""Batch Inverse Kinematics
+
+Same maths as WalkingMechanism.ik, solved for whole arrays of targets at once.
+Any argument may be an array, e.g. targets of shape [legs, steps] with pivots
+and arm lengths of shape [legs, 1]. Angles are returned in radians.
+When every argument is a plain number it dispatches to ik_scalar, the two
+paths agree to within a few ULP (NumPy's vectorised acos and atan2 round
+differently from libm).
+"""
+def ik_batch(x, y, pX, pY, arm1, arm2, elbow=1):
+    if _all_scalar(x, y, pX, pY, arm1, arm2):
+        return ik_scalar(x, y, pX, pY, arm1, arm2, elbow)
+
+    arm1 = np.asarray(arm1, dtype=float)
+    arm2 = np.asarray(arm2, dtype=float)
+    pX = np.asarray(pX, dtype=float)
+    pY = np.asarray(pY, dtype=float)
+    x, y, dx, dy, b = clamp_to_reach(x, y, pX, pY, arm1, arm2)
+
+    cos_beta = (b**2 - arm1**2 - arm2**2) / (2 * arm1 * arm2)
+    beta = elbow * np.arccos(np.clip(cos_beta, -1, 1))
+    k1 = arm1 + arm2 * np.cos(beta)
+    k2 = arm2 * np.sin(beta)
+    alpha = np.arctan2(dy, dx) - np.arctan2(k2, k1)
+
+    elbowX = pX + arm1 * np.cos(alpha)
+    elbowY = pY + arm1 * np.sin(alpha)
+    wristX = elbowX + arm2 * np.cos(alpha + beta)
+    wristY = elbowY + arm2 * np.sin(alpha + beta)
+
+    return alpha, beta, elbowX, elbowY, wristX, wristY
+
+
+"""Forward Kinematics, elbow and wrist positions of joint angles in radians"""
+def fk(alpha, beta, pX, pY, arm1, arm2):
+    elbowX = pX + arm1 * np.cos(alpha)
+    elbowY = pY + arm1 * np.sin(alpha)
+    wristX = elbowX + arm2 * np.cos(alpha + beta)
+    wristY = elbowY + arm2 * np.sin(alpha + beta)
+    return elbowX, elbowY, wristX, wristY
+
+
+"""Jacobian of the wrist position, d(wristX, wristY) / d(alpha, beta), shape [..., 2, 2]"""
+def jacobian(alpha, beta, arm1, arm2):
+    s1, c1 = np.sin(alpha), np.cos(alpha)
+    s12, c12 = np.sin(alpha + beta), np.cos(alpha + beta)
+    return np.stack([np.stack([-arm1 * s1 - arm2 * s12, -arm2 * s12], axis=-1),
+                     np.stack([arm1 * c1 + arm2 * c12, arm2 * c12], axis=-1)], axis=-2)
+
+
+class VelocityIK:
+    """Incremental IK tracking moving targets through the analytic Jacobian.
+
+    Each step() moves the joints by J^-1 (target - wrist), one Newton step
+    from the previous solution. The sines and cosines of the new angles give
+    both the positions and the next Jacobian, so a tick costs four sin/cos
+    instead of the arccos/arctan2 solve plus forward kinematics. That is accurate once the targets move a
+    little per tick, e.g. interpolating between keyframes at 1 kHz. Legs
+    whose target is near full extension or full fold, where the Jacobian is
+    singular and ik_batch clamps, or whose step would exceed max_step
+    radians, are solved fully instead and counted in fallbacks.
+    """
+
+    def __init__(self, pX, pY, arm1, arm2, elbow=1, margin=0.02, max_step=0.2):
+        self.pX = np.asarray(pX, dtype=float)
+        self.pY = np.asarray(pY, dtype=float)
+        self.arm1 = np.asarray(arm1, dtype=float)
+        self.arm2 = np.asarray(arm2, dtype=float)
+        self.elbow = elbow
+        self.max_step = max_step
+        self.max_reach = (self.arm1 + self.arm2) * (1 - margin)
+        self.min_reach = np.abs(self.arm1 - self.arm2) + (self.arm1 + self.arm2) * margin
+        self.joints = None
+        self.trig = None
+        self.fallbacks = 0
+
+    """Full solve, also used to seed the tracking"""
+    def reset(self, x, y):
+        self.joints = ik_batch(x, y, self.pX, self.pY, self.arm1, self.arm2, self.elbow)
+        alpha, beta = self.joints[:2]
+        self.trig = np.cos(alpha), np.sin(alpha), np.cos(alpha + beta), np.sin(alpha + beta)
+        return self.joints
+
+    def step(self, x, y):
+        if self.joints is None:
+            return self.reset(x, y)
+
+        alpha, beta, _, _, wristX, wristY = self.joints
+        c1, s1, c12, s12 = self.trig
+        errX, errY = x - wristX, y - wristY
+        # sin(beta) from the cached angles, det of the Jacobian is arm1 * arm2 * sin(beta)
+        det = self.arm1 * self.arm2 * (s12 * c1 - c12 * s1)
+        # A singular Jacobian gives inf and NaN here, those legs are solved fully below
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d_alpha = self.arm2 * (c12 * errX + s12 * errY) / det
+            d_beta = -((self.arm1 * c1 + self.arm2 * c12) * errX + (self.arm1 * s1 + self.arm2 * s12) * errY) / det
+
+            alpha, beta = alpha + d_alpha, beta + d_beta
+            c1, s1, c12, s12 = np.cos(alpha), np.sin(alpha), np.cos(alpha + beta), np.sin(alpha + beta)
+        elbowX, elbowY = self.pX + self.arm1 * c1, self.pY + self.arm1 * s1
+        joints = alpha, beta, elbowX, elbowY, elbowX + self.arm2 * c12, elbowY + self.arm2 * s12
+
+        reach2 = (x - self.pX)**2 + (y - self.pY)**2
+        singular = ((reach2 > self.max_reach**2) | (reach2 < self.min_reach**2)
+                    | ~(np.abs(d_alpha) + np.abs(d_beta) <= self.max_step))
+        if singular.any():
+            self.fallbacks += int(np.count_nonzero(singular))
+            full = ik_batch(x, y, self.pX, self.pY, self.arm1, self.arm2, self.elbow)
+            joints = tuple(np.where(singular, f, j) for f, j in zip(full, joints))
+            alpha, beta = joints[:2]
+            c1, s1, c12, s12 = np.cos(alpha), np.sin(alpha), np.cos(alpha + beta), np.sin(alpha + beta)
+
+        self.joints = joints
+        self.trig = c1, s1, c12, s12
+        return joints
+
+
+"""python kinematics.py, checks that both backends agree over targets in and out of reach"""
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    worst = 0.0
+    for arm1, arm2 in ((40, 40), (100, 156), (40, 55)):
+        for elbow in (1, -1):
+            x, y = rng.uniform(-2.5, 2.5, (2, 2000)) * (arm1 + arm2)
+            batch = np.stack(ik_batch(x, y, 0.0, 0.0, arm1, arm2, elbow), axis=-1)
+            scalar = np.array([ik_batch(float(a), float(b), 0.0, 0.0, arm1, arm2, elbow) for a, b in zip(x, y)])
+            worst = max(worst, np.abs(batch - scalar).max())
+            assert np.allclose(batch, scalar, rtol=0, atol=1e-9), (arm1, arm2, elbow)
+    print(f"scalar and batch IK agree, largest difference {worst:.1e}")
@@ -0,0 +1,377 @@
+import collections
+import time
+
+import numpy as np
+
+from gait_table import GaitTable
+from kinematics import clamp_to_reach, ik_batch
+from leg_state import LegArray
+from profiling import NullProfiler
+from scheduler import FixedRateScheduler
+from servo_protocol import DeltaEncoder, encode_frame, encode_text
+from trajectory import Trajectory, TrajectoryPlanner, stance_segment, swing_segment
+from visualizer import BlitManager, LegArtists
+
+
+"""Servo frame formats LegMovement can send, None sends nothing"""
+PROTOCOLS = ("text", "binary", "delta")
+
+
+class Leg:
+    """Geometry of one leg, shared by the WalkingMechanism of every script.
+
+    Subclasses add the foot path. VIEW is the floor, xlim and ylim the leg
+    is drawn with when ik() is given an axis.
+    """
+
+    VIEW = (90, (0, 200), (0, 200))
+    TRAJECTORY_CACHE = 8
+
+    def __init__(self, arm1, arm2, pivotX, pivotY, ax=None, fig=None, offset=0):
+        self.arm1 = arm1
+        self.arm2 = arm2
+        self.pivotX = pivotX
+        self.pivotY = pivotY
+        self.ax = ax
+        self.is_animating = False
+        self.fig = fig
+        self.artists = None
+        self.trajectories = collections.OrderedDict()
+        self.planner = None
+        self.offset = offset
+        self.current_phase = 0
+
+
+    def subplots(self, x, y, pX, pY):
+
+        if self.artists is None:
+            self.artists = LegArtists(self.ax, *self.VIEW)
+            # Blitting only this leg's axis, other legs may be drawn on the same figure
+            self.blitter = BlitManager(self.fig.canvas, self.artists.artists, self.ax.bbox)
+        self.artists.set(x, y, pX, pY, self.alpha, self.beta, self.elbowX, self.elbowY, self.wristX, self.wristY)
+        self.blitter.update()
+
+
+    def ik(self, x, y, pX=0, pY=0):
+        # Single targets take the math fast path inside ik_batch
+        self.alpha, self.beta, self.elbowX, self.elbowY, self.wristX, self.wristY = ik_batch(
+            x, y, pX, pY, self.arm1, self.arm2)
+
+        if self.ax is not None:
+            x, y, *_ = clamp_to_reach(x, y, pX, pY, self.arm1, self.arm2)
+            self.subplots(x, y, pX, pY)
+
+    """Batch IK over whole trajectories, angles in radians"""
+    def ik_batch(self, x, y, pX=0, pY=0):
+        return ik_batch(x, y, pX, pY, self.arm1, self.arm2)
+
+
+    """Trajectory cached under key, build() makes it the first time. Only the TRAJECTORY_CACHE most
+    recently used are kept, as a joystick sends a new step length on nearly every move"""
+    def cached_trajectory(self, key, build):
+        if key in self.trajectories:
+            self.trajectories.move_to_end(key)
+        else:
+            self.trajectories[key] = build()
+            if len(self.trajectories) > self.TRAJECTORY_CACHE:
+                self.trajectories.popitem(last=False)
+        return self.trajectories[key]
+
+
+    """Foot path at absolute times that follows retarget() smoothly instead of jumping to the new curve"""
+    def foot_planner(self, blend_time=0.1, swing_time=None, stance_time=None, start=0.0):
+        self.planner_times = (swing_time, stance_time)
+        self.planner = TrajectoryPlanner(self.foot_trajectory(swing_time, stance_time), blend_time, start)
+        return self.planner
+
+
+class CycloidalLeg(Leg):
+    """Leg swinging on a cycloid and bobbing through stance, with a fixed pivot."""
+
+    def __init__(self, arm1, arm2, pivotX, pivotY, start, step_length, ax=None, fig=None, offset=0):
+        super().__init__(arm1, arm2, pivotX, pivotY, ax, fig, offset)
+        self.x0, self.y0 = start[0], start[1]
+        self.step_length = step_length
+        self.lift_ratio = 0.5
+        self.bob = 3
+        self.swing_steps = 30
+        self.stance_steps = 30
+
+        self.cycloidal_between()
+
+
+    """Cyclodial Path for forward Movement"""
+    def cycloidal_between(self, steps=None, lift_ratio=None):
+        steps = self.swing_steps if steps is None else steps
+        lift_ratio = self.lift_ratio if lift_ratio is None else lift_ratio
+        t = np.linspace(0, 1, steps)
+
+        dx, dy = self.step_length, 0
+        distance = np.hypot(dx, dy)
+        height = lift_ratio * distance
+        x = self.x0 + dx * (t - (1 / (2 * np.pi)) * np.sin(2 * np.pi * t))
+        y_base = self.y0 + dy * t
+        y = y_base + height * np.sin(np.pi * t)
+        return x, y
+
+    """Bobbing Shape"""
+    def stance_phase_fixed_pivot(self, steps=None):
+        steps = self.stance_steps if steps is None else steps
+        t = np.linspace(0, 1, steps)
+
+        pivot_x = (1 - t) * (self.x0 + self.step_length) + t * self.x0
+
+        vertical_bob = self.bob * np.sin(np.pi * t)
+        pivot_y = self.y0 + vertical_bob
+
+        return pivot_x, pivot_y
+
+
+    """Swing then stance as a Trajectory to resample at any rate, durations default to the step counts at 100 Hz"""
+    def foot_trajectory(self, swing_time=None, stance_time=None):
+        swing_time = self.swing_steps / 100 if swing_time is None else swing_time
+        stance_time = self.stance_steps / 100 if stance_time is None else stance_time
+        return self.cached_trajectory((self.gait_key(), swing_time, stance_time), lambda: Trajectory([
+            swing_segment(swing_time, self.x0, self.y0, self.step_length, self.lift_ratio),
+            stance_segment(stance_time, self.x0, self.y0, self.step_length, self.bob)]))
+
+
+    """Changing step_length or the start position at time t mid-gait, e.g. from a joystick.
+    The planner finishes the current segment on the new curve, blended from the old one"""
+    def retarget(self, t, step_length=None, start=None):
+        if step_length is not None:
+            self.step_length = step_length
+        if start is not None:
+            self.x0, self.y0 = start[0], start[1]
+        if self.planner is not None:
+            self.planner.replan(t, self.foot_trajectory(*self.planner_times))
+        return self.planner
+
+
+    def swing_phase(self, steps=None):
+        swing_x, swing_y = self.cycloidal_between(steps)
+        return swing_x, swing_y, self.pivotX, self.pivotY
+
+
+    def stance_phase(self, steps=None):
+        stance_pivot_x, stance_pivot_y = self.stance_phase_fixed_pivot(steps)
+        return stance_pivot_x, stance_pivot_y, self.pivotX, self.pivotY
+
+
+    """Everything the compiled gait table depends on"""
+    def gait_key(self):
+        return (self.arm1, self.arm2, self.pivotX, self.pivotY, self.x0, self.y0,
+                self.step_length, self.lift_ratio, self.swing_steps, self.stance_steps, self.bob)
+
+
+    def working_pipeline(self, global_step):
+
+        if (global_step + self.offset) % 2 == 0:
+            self.swing_phase()
+
+        else:
+            self.stance_phase()
+
+
+class LegMovement:
+    """Control loop of a set of legs: compiles the gait, sends servo frames and publishes joint state.
+
+    protocol is one of PROTOCOLS, or None to send no servo frames. Binary
+    and delta frames need a port, text frames are printed without one.
+    Subscribers such as a LegVisualizer get the [legs, 6] joint state and
+    [legs, 2] pivots on every tick.
+    """
+
+    def __init__(self, legs, visualizer=None, frequency=100, policy="skip", protocol=None, port=None,
+                 profiler=None, keyframe_interval=50, telemetry=None, calibration=None):
+        if protocol is not None and protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol {protocol!r}, expected 'text', 'binary' or 'delta'")
+        if protocol in ("binary", "delta") and port is None:
+            raise ValueError(f"The {protocol} protocol needs a port to write frames to")
+
+        self.legs = legs
+        self.protocol = protocol
+        self.port = port
+        self.seq = 0
+        self.delta_encoder = DeltaEncoder(keyframe_interval) if protocol == "delta" else None
+        self.gait_table = None
+        self.visualizer = visualizer
+        self.subscribers = []
+        # Headless runs only sleep, the visualizer also processes GUI events while waiting
+        self.sleep = time.sleep if visualizer is None else visualizer.pause
+        self.scheduler = FixedRateScheduler(frequency, policy, sleep=self.sleep)
+        self.profiler = NullProfiler() if profiler is None else profiler
+        self.telemetry = telemetry
+        self.calibration = calibration
+
+        if visualizer is not None:
+            self.subscribe(visualizer.update)
+
+
+    """Callbacks receiving the joint state of all legs on every tick"""
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+
+    def publish(self, frame, pivots):
+        for callback in self.subscribers:
+            callback(frame, pivots)
+
+
+    """One full gait cycle of foot targets, the swing moves through the legs in turn.
+    A phase lasts as long as its leg's swing, and each other leg covers its stance once over the
+    phases it stands through, so no curve is cut short and no foot jumps back between phases"""
+    def gait_cycle(self):
+        swings = [leg.swing_phase() for leg in self.legs]
+        lengths = [len(x) for x, y, pX, pY in swings]
+        footX, footY, pivotX, pivotY = ([] for _ in range(4))
+
+        for i, (leg, (swing_x, swing_y, pX, pY)) in enumerate(zip(self.legs, swings)):
+            standing = sum(lengths) - lengths[i]
+            stance_x, stance_y, pX, pY = leg.stance_phase(standing)
+            # Leg i swings in phase i, so its swing starts after the swings of the legs before it
+            start = sum(lengths[:i])
+            footX.append(np.roll(np.concatenate([swing_x, stance_x]), start))
+            footY.append(np.roll(np.concatenate([swing_y, stance_y]), start))
+            pivotX.append(np.full(len(footX[-1]), pX, dtype=float))
+            pivotY.append(np.full(len(footY[-1]), pY, dtype=float))
+
+        return [np.array(v) for v in (footX, footY, pivotX, pivotY)]
+
+
+    """Compiling the gait table once, and again only when the geometry changes"""
+    def compile_gait(self):
+        key = tuple(leg.gait_key() for leg in self.legs)
+        if self.gait_table is None or self.gait_table.key != key:
+            footX, footY, pivotX, pivotY = self.gait_cycle()
+            self.gait_table = GaitTable(footX, footY, pivotX, pivotY,
+                                        [leg.arm1 for leg in self.legs], [leg.arm2 for leg in self.legs], key)
+            self.on_compiled(self.gait_table)
+        return self.gait_table
+
+
+    """Whole degrees per leg in leg order, the third joint is always 0"""
+    @staticmethod
+    def commands(alpha, beta):
+        mylst = np.zeros(alpha.shape + (3,), dtype=int)
+        mylst[..., 0] = np.rad2deg(alpha).astype(int)
+        mylst[..., 1] = np.rad2deg(beta).astype(int)
+        return mylst.reshape(alpha.shape[:-1] + (-1,))
+
+
+    """Servo commands through the calibration when there is one"""
+    def servo_commands(self, alpha, beta):
+        if self.calibration is None:
+            return self.commands(alpha, beta)
+        return self.calibration.commands(alpha, beta)
+
+
+    """The whole cycle is checked against the joint limits once here, not frame by frame while streaming"""
+    def on_compiled(self, table):
+        if self.calibration is not None:
+            self.calibration.validate(table.alpha, table.beta, self.scheduler.frequency)
+        self.command_table = self.servo_commands(table.alpha, table.beta)
+
+
+    """Binary and delta frames go to the port, text frames are printed unless a port is given.
+    A Transmitter works as the port and moves the writes off the control loop."""
+    def send(self, angles):
+        if self.protocol is None:
+            return
+        if self.protocol == "binary":
+            self.port.write(encode_frame(angles, self.seq))
+        elif self.protocol == "delta":
+            self.port.write(self.delta_encoder.encode(angles, self.seq))
+        elif self.port is not None:
+            self.port.write(f"{encode_text(angles)}\n".encode())
+        else:
+            print(encode_text(angles))
+        self.seq += 1
+
+
+    def start(self):
+        tick = 0
+        self.scheduler.start()
+
+        profiler = self.profiler
+
+        while 1:
+            profiler.begin()
+            table = self.compile_gait()
+            profiler.mark("compile")
+            i = tick % len(table)
+            frame, pivots, commands = table.frames[i], table.pivots[i], self.command_table[i]
+            profiler.mark("lookup")
+            if self.telemetry is not None:
+                self.telemetry.record(tick, i, table.targets[i], table.clamped[i], frame[:, 0], frame[:, 1])
+                profiler.mark("record")
+            self.send(commands)
+            profiler.mark("emit")
+            self.publish(frame, pivots)
+            profiler.mark("render")
+            tick += self.scheduler.wait()
+            profiler.mark("wait")
+            profiler.end()
+
+
+    """Replaying a gait compiled by trajectory_file, nothing is solved at runtime.
+    Frames are paced at the rate the file was compiled for, whatever the frequency given here"""
+    def play(self, playback):
+        if self.calibration is not None:
+            self.calibration.validate(playback.joints[..., 0], playback.joints[..., 1], playback.rate)
+        self.scheduler = FixedRateScheduler(playback.rate, self.scheduler.policy, sleep=self.sleep)
+        profiler = self.profiler
+        # The stream waits for each deadline before it yields the frame, so that is charged to wait
+        frames = playback.stream(self.scheduler)
+        record = next(frames)
+
+        while 1:
+            profiler.begin()
+            joints = record["joints"]
+            self.send(self.servo_commands(joints[:, 0], joints[:, 1]))
+            profiler.mark("emit")
+            self.publish(joints, record["pivots"])
+            profiler.mark("render")
+            record = next(frames)
+            profiler.mark("wait")
+            profiler.end()
+
+
+    """Sampling the analytic curves at the continuous gait phase on every tick, at any control rate.
+    velocity_ik tracks the targets with VelocityIK instead of a full solve per tick"""
+    def start_phase_clock(self, gait, velocity_ik=False):
+        self.leg_state = LegArray.from_legs(self.legs, gait.offsets)
+        if velocity_ik:
+            self.leg_state.use_velocity_ik()
+        if self.calibration is not None:
+            # One cycle at the control rate, checked like a compiled table before anything is streamed
+            rate = self.scheduler.frequency
+            cycle = self.leg_state.sample_cycle(gait, max(2, int(round(gait.clock * rate))))
+            self.calibration.validate(cycle[..., 0], cycle[..., 1], rate)
+        state = self.leg_state
+        pivots = state.pivots
+        # Telemetry's phase is the tick within the cycle at the control rate, like the table index
+        cycle_ticks = gait.clock * self.scheduler.frequency
+        tick = 0
+        profiler = self.profiler
+        self.scheduler.start()
+
+        while 1:
+            profiler.begin()
+            frame = state.update(gait)
+            profiler.mark("ik")
+            if self.telemetry is not None:
+                clampedX, clampedY = clamp_to_reach(state.targets[:, 0], state.targets[:, 1], state.pivotX,
+                                                    state.pivotY, state.arm1, state.arm2)[:2]
+                self.telemetry.record(tick, int(gait.phase * cycle_ticks), state.targets,
+                                      np.stack([clampedX, clampedY], axis=-1), frame[:, 0], frame[:, 1])
+                profiler.mark("record")
+            self.send(self.servo_commands(frame[:, 0], frame[:, 1]))
+            profiler.mark("emit")
+            self.publish(frame, pivots)
+            profiler.mark("render")
+            ticks = self.scheduler.wait()
+            gait.advance(ticks * self.scheduler.period)
+            tick += ticks
+            profiler.mark("wait")
+            profiler.end()
@@ -0,0 +1,69 @@
+import numpy as np
+
+from kinematics import VelocityIK, ik_batch
+
+
+class LegArray:
+    """Struct-of-arrays state of N legs.
+
+    Every per-leg quantity (arm lengths, pivots, start positions, step length,
+    lift ratio, bob, phase offset) is one [legs] array, and the latest foot targets
+    and joint state live in [legs, 2] and [legs, 6] arrays. update() advances
+    all legs with a single vectorized sample and IK call, so a hexapod or an
+    8-leg rig costs array length rather than Python iterations.
+    """
+
+    FIELDS = ("arm1", "arm2", "pivotX", "pivotY", "x0", "y0", "step_length", "lift_ratio", "bob", "offsets")
+
+    def __init__(self, arm1, arm2, pivotX, pivotY, x0, y0, step_length, lift_ratio=0.5, bob=3, offsets=0.0,
+                 legs=None):
+        values = [np.asarray(v, dtype=float) for v in (arm1, arm2, pivotX, pivotY, x0, y0,
+                                                        step_length, lift_ratio, bob, offsets)]
+        legs = max(v.size for v in values) if legs is None else legs
+
+        for name, value in zip(self.FIELDS, values):
+            setattr(self, name, np.array(np.broadcast_to(value, (legs,))))
+        self.targets = np.zeros((legs, 2))
+        self.joints = np.zeros((legs, 6))
+        self.velocity_ik = None
+
+    """Gathering WalkingMechanism legs, offsets are phase offsets such as a gait's"""
+    @classmethod
+    def from_legs(cls, legs, offsets=0.0):
+        columns = [[getattr(leg, name) for leg in legs] for name in
+                   ("arm1", "arm2", "pivotX", "pivotY", "x0", "y0", "step_length", "lift_ratio", "bob")]
+        return cls(*columns, offsets=offsets, legs=len(legs))
+
+    def __len__(self):
+        return len(self.arm1)
+
+    @property
+    def pivots(self):
+        return np.stack([self.pivotX, self.pivotY], axis=-1)
+
+
+    """Tracking the targets with the Jacobian instead of a full solve per tick, for high control rates"""
+    def use_velocity_ik(self, **options):
+        self.velocity_ik = VelocityIK(self.pivotX, self.pivotY, self.arm1, self.arm2, **options)
+        return self.velocity_ik
+
+
+    """Joint state [ticks, legs, 6] of one whole gait cycle from the gait's current phase, the live state is untouched"""
+    def sample_cycle(self, gait, ticks):
+        phase = (gait.phase + np.arange(ticks)[:, None] / ticks) % 1.0
+        x, y = gait.sample(self.x0, self.y0, self.step_length, self.lift_ratio, self.bob,
+                           phase=phase, offsets=self.offsets)
+        return np.stack(ik_batch(x, y, self.pivotX, self.pivotY, self.arm1, self.arm2), axis=-1)
+
+
+    """One tick for all legs, sampling the gait at its current phase and solving IK"""
+    def update(self, gait):
+        x, y = gait.sample(self.x0, self.y0, self.step_length, self.lift_ratio, self.bob, offsets=self.offsets)
+        self.targets[:, 0] = x
+        self.targets[:, 1] = y
+        if self.velocity_ik is None:
+            joints = ik_batch(x, y, self.pivotX, self.pivotY, self.arm1, self.arm2)
+        else:
+            joints = self.velocity_ik.step(x, y)
+        self.joints[:] = np.stack(joints, axis=-1)
+        return self.joints
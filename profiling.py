@@ -0,0 +1,92 @@
+import atexit
+import json
+import time
+
+import numpy as np
+
+
+"""Sections of a tick in each LegMovement loop: start, start_phase_clock and play.
+record only runs with telemetry, loop_sections() leaves it out otherwise"""
+LOOP_SECTIONS = {
+    "table": ("compile", "lookup", "record", "emit", "render", "wait"),
+    "phase_clock": ("ik", "record", "emit", "render", "wait"),
+    "play": ("emit", "render", "wait"),
+}
+
+
+def loop_sections(loop, telemetry=False):
+    return tuple(section for section in LOOP_SECTIONS[loop] if telemetry or section != "record")
+
+
+class FrameProfiler:
+    """Per-tick time spent in each section of the control loop.
+
+    begin() opens a tick, mark(section) charges the time since the previous
+    mark to that section and end() closes the tick. Timings go into a
+    preallocated [capacity, sections] ring buffer, so profiling a long run
+    costs a clock read and an array store per section and no allocations.
+    With dump_path the summary is written as JSON when the process exits.
+    """
+
+    def __init__(self, sections, capacity=4096, clock=time.perf_counter, dump_path=None):
+        self.sections = tuple(sections)
+        self.columns = {section: i for i, section in enumerate(self.sections)}
+        self.samples = np.zeros((capacity, len(self.sections)))
+        self.capacity = capacity
+        self.clock = clock
+        self.ticks = 0
+        self.row = 0
+        self.last = 0.0
+
+        if dump_path is not None:
+            atexit.register(self.dump, dump_path)
+
+
+    def begin(self):
+        self.row = self.ticks % self.capacity
+        self.samples[self.row] = 0.0
+        self.last = self.clock()
+
+
+    def mark(self, section):
+        now = self.clock()
+        self.samples[self.row, self.columns[section]] += now - self.last
+        self.last = now
+
+
+    def end(self):
+        self.ticks += 1
+
+
+    """Milliseconds per section over the ticks still in the buffer"""
+    def summary(self):
+        samples = self.samples[:min(self.ticks, self.capacity)] * 1e3
+        if len(samples) == 0:
+            return {"ticks": 0}
+
+        sections = dict(zip(self.sections, samples.T))
+        sections["total"] = samples.sum(axis=1)
+        summary = {"ticks": self.ticks}
+        for section, times in sections.items():
+            p50, p99 = np.percentile(times, [50, 99])
+            summary[section] = {"p50_ms": float(p50), "p99_ms": float(p99), "max_ms": float(times.max()),
+                                "mean_ms": float(times.mean())}
+        return summary
+
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off, so the loop needs no branches."""
+
+    def begin(self):
+        pass
+
+    def mark(self, section):
+        pass
+
+    def end(self):
+        pass
@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+
+
+class FixedRateScheduler:
+    """Paces a control loop at a fixed frequency using absolute deadlines.
+
+    Deadlines are start + n * period, so time spent in a tick never shifts the
+    following ticks. wait() returns how many ticks the loop should advance:
+    with policy "skip" a late tick jumps over the deadlines it missed, with
+    "catch_up" every tick is kept and run back to back until the loop is on
+    time again (at most max_catch_up ticks behind, beyond that it resyncs).
+    Lateness of every wake-up is kept in a ring buffer for jitter statistics.
+    """
+
+    def __init__(self, frequency, policy="skip", max_catch_up=5, history=1024,
+                 clock=time.perf_counter, sleep=time.sleep):
+        if policy not in ("skip", "catch_up"):
+            raise ValueError(f"Unknown policy {policy!r}, expected 'skip' or 'catch_up'")
+
+        self.frequency = frequency
+        self.period = 1.0 / frequency
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+        self.lateness = np.zeros(history)
+        self.reset()
+
+
+    def reset(self):
+        self.started = None
+        self.next_deadline = None
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.resyncs = 0
+
+
+    def start(self):
+        self.reset()
+        self.started = self.clock()
+        self.next_deadline = self.started + self.period
+
+
+    def wait(self):
+        if self.next_deadline is None:
+            self.start()
+
+        # Late ticks still sleep(0), GUI-aware sleeps use it to process pending events
+        self.sleep(max(0.0, self.next_deadline - self.clock()))
+        now = self.clock()
+
+        late = now - self.next_deadline
+        self.lateness[self.ticks % len(self.lateness)] = late
+        self.ticks += 1
+        missed = max(0, int(late // self.period))
+
+        if missed == 0:
+            self.next_deadline += self.period
+            return 1
+
+        self.overruns += 1
+        if self.policy == "catch_up" and missed <= self.max_catch_up:
+            self.next_deadline += self.period
+            return 1
+
+        if self.policy == "catch_up":
+            self.resyncs += 1
+        self.skipped += missed
+        self.next_deadline += (missed + 1) * self.period
+        return missed + 1
+
+
+    """Jitter is the lateness of each wake-up against its deadline, in seconds"""
+    def stats(self):
+        lateness = self.lateness[:min(self.ticks, len(self.lateness))]
+        elapsed = self.clock() - self.started if self.started is not None else 0.0
+
+        return {
+            "frequency": self.frequency,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "resyncs": self.resyncs,
+            "achieved_rate": self.ticks / elapsed if elapsed > 0 else 0.0,
+            "jitter_mean": float(lateness.mean()) if len(lateness) else 0.0,
+            "jitter_p99": float(np.percentile(lateness, 99)) if len(lateness) else 0.0,
+            "jitter_max": float(lateness.max()) if len(lateness) else 0.0,
+        }
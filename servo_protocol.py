@@ -0,0 +1,303 @@
+import struct
+
+import numpy as np
+
+
+"""Binary servo frames
+
+    magic    2 bytes  A5 5A
+    seq      uint16   little endian, wraps at 65536
+    count    uint8    number of joints
+    angles   int16    whole degrees, one per joint, little endian
+    checksum uint16   CRC-16/CCITT over seq, count and angles
+
+Twelve joints take a fixed 31 bytes, the "<a,b,0,...>" text frame takes
+around 40 plus the newline. Text stays available through encode_text and
+decode_text.
+"""
+MAGIC = b"\xa5\x5a"
+JOINTS = 12
+
+
+def frame_dtype(joints=JOINTS):
+    return np.dtype([("magic", "u1", (2,)), ("seq", "<u2"), ("count", "u1"),
+                     ("angles", "<i2", (joints,)), ("checksum", "<u2")])
+
+
+def _crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+CRC16_TABLE = _crc16_table()
+_CRC16_ARRAY = np.array(CRC16_TABLE, dtype=np.uint16)
+
+
+"""CRC-16/CCITT-FALSE, table driven so it stays cheap on the microcontroller"""
+def crc16(data):
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+"""CRC-16 of every row of a [frames, bytes] uint8 array"""
+def crc16_rows(rows):
+    crc = np.full(len(rows), 0xFFFF, dtype=np.uint16)
+    for column in rows.T:
+        crc = (crc << 8) ^ _CRC16_ARRAY[(crc >> 8) ^ column]
+    return crc
+
+
+def encode_frame(angles, seq):
+    body = struct.pack(f"<HB{len(angles)}h", seq & 0xFFFF, len(angles), *(int(a) for a in angles))
+    return MAGIC + body + struct.pack("<H", crc16(body))
+
+
+"""Packing a [frames, joints] array of angles in one go, for batched writes"""
+def encode_frames(angles, seq_start=0):
+    angles = np.atleast_2d(np.asarray(angles))
+    frames = np.zeros(len(angles), dtype=frame_dtype(angles.shape[1]))
+    frames["magic"] = np.frombuffer(MAGIC, dtype=np.uint8)
+    frames["seq"] = (seq_start + np.arange(len(angles))) & 0xFFFF
+    frames["count"] = angles.shape[1]
+    frames["angles"] = angles
+
+    raw = frames.view(np.uint8).reshape(len(frames), -1)
+    frames["checksum"] = crc16_rows(raw[:, 2:-2])
+    return frames.tobytes()
+
+
+"""Decoding a buffer made only of whole frames, returns seq [frames] and angles [frames, joints]"""
+def decode_frames(data, joints=JOINTS):
+    dtype = frame_dtype(joints)
+    if len(data) % dtype.itemsize:
+        raise ValueError(f"Buffer of {len(data)} bytes is not a whole number of {dtype.itemsize} byte frames")
+
+    frames = np.frombuffer(data, dtype=dtype)
+    raw = frames.view(np.uint8).reshape(len(frames), -1)
+    bad = ((raw[:, :2] != np.frombuffer(MAGIC, dtype=np.uint8)).any(axis=1)
+           | (frames["count"] != joints)
+           | (crc16_rows(raw[:, 2:-2]) != frames["checksum"]))
+    if bad.any():
+        raise ValueError(f"Corrupt frames at {np.flatnonzero(bad).tolist()}")
+
+    return frames["seq"].copy(), frames["angles"].astype(int)
+
+
+class FrameDecoder:
+    """Incremental decoder for a byte stream, resynchronising on the magic.
+
+    feed() accepts any chunking of the stream and returns the complete frames
+    found so far as (seq, angles) pairs. Frames failing the count or checksum
+    test are dropped and counted in errors.
+    """
+
+    def __init__(self, joints=JOINTS):
+        self.joints = joints
+        self.size = frame_dtype(joints).itemsize
+        self.buffer = bytearray()
+        self.errors = 0
+
+    def feed(self, data):
+        self.buffer += data
+        decoded = []
+
+        while True:
+            start = self.buffer.find(MAGIC)
+            if start < 0:
+                # Keep a trailing first magic byte, the second may still arrive
+                del self.buffer[:max(0, len(self.buffer) - 1)]
+                break
+            del self.buffer[:start]
+            if len(self.buffer) < self.size:
+                break
+
+            frame = bytes(self.buffer[:self.size])
+            seq, count = struct.unpack_from("<HB", frame, 2)
+            checksum, = struct.unpack_from("<H", frame, self.size - 2)
+            if count != self.joints or crc16(frame[2:-2]) != checksum:
+                self.errors += 1
+                del self.buffer[:1]
+                continue
+
+            decoded.append((seq, list(struct.unpack_from(f"<{self.joints}h", frame, 5))))
+            del self.buffer[:self.size]
+
+        return decoded
+
+
+"""Delta frames
+
+Full frames above act as keyframes. In between, a delta frame only carries
+the joints that moved since the previous frame:
+
+    magic    2 bytes  A5 5B
+    seq      uint16   little endian, continues the keyframe numbering
+    count    uint8    number of joints
+    mask     ceil(count / 8) bytes, bit i set when joint i changed
+    deltas   int8     change in whole degrees of each set joint, in order
+    checksum uint16   CRC-16/CCITT over seq, count, mask and deltas
+
+The constant third joint of each leg never appears, and a stance tick where
+nothing moved is 8 bytes instead of 31. Deltas chain from frame to frame,
+so after a lost frame the decoder drops deltas until the next keyframe.
+"""
+DELTA_MAGIC = b"\xa5\x5b"
+
+
+def encode_delta(previous, angles, seq):
+    change = np.asarray(angles, dtype=int) - np.asarray(previous, dtype=int)
+    moved = change != 0
+    body = (struct.pack("<HB", seq & 0xFFFF, len(change)) + np.packbits(moved, bitorder="little").tobytes()
+            + change[moved].astype(np.int8).tobytes())
+    return DELTA_MAGIC + body + struct.pack("<H", crc16(body))
+
+
+class DeltaEncoder:
+    """Keyframes every keyframe_interval frames and delta frames in between.
+
+    A keyframe is also sent whenever a joint moves by more than an int8 delta
+    can hold. A shorter interval recovers sooner from lost frames at the cost
+    of bandwidth.
+    """
+
+    def __init__(self, keyframe_interval=50):
+        if keyframe_interval < 1:
+            raise ValueError(f"keyframe_interval must be at least 1, got {keyframe_interval}")
+        self.keyframe_interval = keyframe_interval
+        self.previous = None
+        self.since_keyframe = 0
+        self.keyframes = 0
+        self.deltas = 0
+
+    def encode(self, angles, seq):
+        angles = np.asarray(angles, dtype=int)
+        if (self.previous is None or len(angles) != len(self.previous)
+                or self.since_keyframe >= self.keyframe_interval - 1
+                or np.abs(angles - self.previous).max() > 127):
+            frame = encode_frame(angles, seq)
+            self.since_keyframe = 0
+            self.keyframes += 1
+        else:
+            frame = encode_delta(self.previous, angles, seq)
+            self.since_keyframe += 1
+            self.deltas += 1
+
+        self.previous = angles
+        return frame
+
+
+class DeltaDecoder:
+    """Incremental decoder for a stream of keyframes and delta frames.
+
+    Like FrameDecoder it accepts any chunking and resynchronises on either
+    magic. A delta is applied only when its seq directly follows the last
+    decoded frame; otherwise it is counted in dropped and ignored until a
+    keyframe restores the state.
+    """
+
+    def __init__(self, joints=JOINTS):
+        self.joints = joints
+        self.mask_size = -(-joints // 8)
+        self.key_size = frame_dtype(joints).itemsize
+        self.buffer = bytearray()
+        self.angles = None
+        self.seq = None
+        self.errors = 0
+        self.dropped = 0
+
+    def _next_magic(self):
+        starts = [i for i in (self.buffer.find(MAGIC), self.buffer.find(DELTA_MAGIC)) if i >= 0]
+        return min(starts) if starts else -1
+
+    def feed(self, data):
+        self.buffer += data
+        decoded = []
+
+        while True:
+            start = self._next_magic()
+            if start < 0:
+                del self.buffer[:max(0, len(self.buffer) - 1)]
+                break
+            del self.buffer[:start]
+
+            keyframe = self.buffer.startswith(MAGIC)
+            if keyframe:
+                size = self.key_size
+            else:
+                header = 5 + self.mask_size
+                if len(self.buffer) < header:
+                    break
+                mask = np.unpackbits(np.frombuffer(bytes(self.buffer[5:header]), dtype=np.uint8),
+                                     count=self.joints, bitorder="little").astype(bool)
+                size = header + int(mask.sum()) + 2
+            if len(self.buffer) < size:
+                break
+
+            frame = bytes(self.buffer[:size])
+            seq, count = struct.unpack_from("<HB", frame, 2)
+            checksum, = struct.unpack_from("<H", frame, size - 2)
+            if count != self.joints or crc16(frame[2:-2]) != checksum:
+                self.errors += 1
+                del self.buffer[:1]
+                continue
+            del self.buffer[:size]
+
+            if keyframe:
+                self.angles = np.array(struct.unpack_from(f"<{self.joints}h", frame, 5))
+            elif self.angles is not None and seq == (self.seq + 1) & 0xFFFF:
+                self.angles = self.angles.copy()
+                self.angles[mask] += np.frombuffer(frame, dtype=np.int8, count=int(mask.sum()), offset=header)
+            else:
+                self.dropped += 1
+                self.angles = None
+                continue
+
+            self.seq = seq
+            decoded.append((seq, self.angles.tolist()))
+
+        return decoded
+
+
+"""Text fallback, the original "<a,b,0,...>" frames"""
+def encode_text(angles):
+    return f"<{','.join(f'{int(a)}' for a in angles)}>"
+
+
+def decode_text(frame):
+    frame = frame.strip()
+    if not (frame.startswith("<") and frame.endswith(">")):
+        raise ValueError(f"Not a text frame: {frame!r}")
+    return [int(a) for a in frame[1:-1].split(",")]
+
+
+class LoopbackPort:
+    """In-memory stand-in for a serial port, whatever is written can be read back."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.bytes_written = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def write(self, data):
+        self.buffer += data
+        self.bytes_written += len(data)
+        return len(data)
+
+    def read(self, size=-1):
+        size = len(self.buffer) if size < 0 else min(size, len(self.buffer))
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def flush(self):
+        pass
@@ -0,0 +1,142 @@
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+"""Shared memory layout of a JointRing
+
+    header   8 int64  legs, capacity, head (frames published), closed flag
+    seqs     int64    [capacity], publish number held by each slot, -1 while written
+    frames   float64  [capacity, legs, 6], alpha, beta, elbowX, elbowY, wristX, wristY
+    pivots   float64  [capacity, legs, 2]
+
+There is a single writer and no lock. The writer marks a slot -1, fills it,
+stores its publish number and only then advances head. A reader copies the
+newest slot and keeps the copy only when the slot still holds that number
+afterwards, so a frame overwritten mid-read is retried instead of torn.
+"""
+HEADER_WORDS = 8
+LEGS, CAPACITY, HEAD, CLOSED = range(4)
+
+
+def _layout(legs, capacity):
+    sizes = [HEADER_WORDS * 8, capacity * 8, capacity * legs * 6 * 8, capacity * legs * 2 * 8]
+    return np.cumsum([0] + sizes)
+
+
+def _attach(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Older versions register the segment with the resource tracker again on
+    # attach. Readers started from the writer share its tracker, so that is harmless
+    return shared_memory.SharedMemory(name=name)
+
+
+class JointRing:
+    """Ring buffer of joint frames in shared memory, written by the control process.
+
+    publish(frame, pivots) has the LegMovement subscriber signature, so the
+    control loop only copies a [legs, 8] frame into memory per tick. Readers
+    in other processes attach by name and take latest() at their own pace.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=shm.buf)
+        self.legs, self.capacity = int(self.header[LEGS]), int(self.header[CAPACITY])
+
+        offsets = _layout(self.legs, self.capacity)
+        self.seqs = np.ndarray(self.capacity, dtype=np.int64, buffer=shm.buf, offset=offsets[1])
+        self.frames = np.ndarray((self.capacity, self.legs, 6), dtype=np.float64, buffer=shm.buf,
+                                 offset=offsets[2])
+        self.pivots = np.ndarray((self.capacity, self.legs, 2), dtype=np.float64, buffer=shm.buf,
+                                 offset=offsets[3])
+
+    @classmethod
+    def create(cls, legs=4, capacity=64, name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=int(_layout(legs, capacity)[-1]))
+        header = np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[LEGS], header[CAPACITY] = legs, capacity
+        np.ndarray(capacity, dtype=np.int64, buffer=shm.buf, offset=HEADER_WORDS * 8)[:] = -1
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach(name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        return int(self.header[HEAD])
+
+    @property
+    def closed(self):
+        return bool(self.header[CLOSED])
+
+
+    def publish(self, frame, pivots):
+        seq = int(self.header[HEAD])
+        slot = seq % self.capacity
+        self.seqs[slot] = -1
+        self.frames[slot] = frame
+        self.pivots[slot] = pivots
+        self.seqs[slot] = seq
+        self.header[HEAD] = seq + 1
+
+
+    """Newest frame as (seq, frame, pivots) copies, None before the first publish"""
+    def latest(self, retries=8):
+        for _ in range(retries):
+            seq = int(self.header[HEAD]) - 1
+            if seq < 0:
+                return None
+            slot = seq % self.capacity
+            frame, pivots = self.frames[slot].copy(), self.pivots[slot].copy()
+            if self.seqs[slot] == seq:
+                return seq, frame, pivots
+        return None
+
+
+    """Telling readers the control loop has stopped, then releasing the memory"""
+    def close(self):
+        if self.owner:
+            self.header[CLOSED] = 1
+        self.header = self.seqs = self.frames = self.pivots = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+"""Visualizer process body, draws the newest frame of the ring at up to fps frames per second"""
+def run_visualizer(name, fps=30, **visualizer_options):
+    from visualizer import LegVisualizer
+
+    ring = JointRing.attach(name)
+    visualizer = LegVisualizer(**visualizer_options)
+    last = -1
+    try:
+        while not ring.closed and visualizer.plt.fignum_exists(visualizer.fig.number):
+            started = time.perf_counter()
+            latest = ring.latest()
+            if latest is not None and latest[0] != last:
+                last, frame, pivots = latest
+                visualizer.update(frame, pivots)
+            visualizer.pause(max(1e-3, 1 / fps - (time.perf_counter() - started)))
+    finally:
+        ring.close()
+
+
+"""Starting run_visualizer in a fresh process, the control process never imports matplotlib"""
+def start_visualizer_process(ring, fps=30, **visualizer_options):
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_visualizer, args=(ring.name, fps), kwargs=visualizer_options, daemon=True)
+    process.start()
+    return process
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+
+"""Telemetry logs
+
+A 64 byte header followed by one fixed-size record per control tick, appended
+while the loop runs:
+
+    magic    4 bytes  b"TLMY"
+    version  uint16
+    legs     uint16
+    start    float64  wall clock time of the first record, seconds since the epoch
+    padding  up to 64 bytes
+
+Records hold the time since start, the tick, the phase index into the gait
+table (on the phase clock, the tick within the gait cycle), and per leg the
+requested foot targets [legs, 2], the targets after reach clamping [legs, 2]
+and alpha and beta [legs] in radians, all little endian. The number of
+records follows from the file size, so a log cut short by a crash is still
+readable up to its last whole record.
+"""
+MAGIC = b"TLMY"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("legs", "<u2"), ("start", "<f8")])
+
+
+def record_dtype(legs):
+    return np.dtype([("time", "<f8"), ("tick", "<u8"), ("phase", "<u4"), ("targets", "<f8", (legs, 2)),
+                     ("clamped", "<f8", (legs, 2)), ("alpha", "<f8", (legs,)), ("beta", "<f8", (legs,))])
+
+
+class TelemetryRecorder:
+    """Append-only writer of a telemetry log.
+
+    record() fills the next row of a preallocated buffer of buffer_records
+    rows, which is written to the file in one go once full, so a tick costs a
+    few array copies and the file is only touched every buffer_records ticks.
+    close() writes what is left.
+    """
+
+    def __init__(self, path, legs, buffer_records=256, clock=time.perf_counter):
+        self.path = path
+        self.legs = legs
+        self.clock = clock
+        self.buffer = np.zeros(buffer_records, dtype=record_dtype(legs))
+        self.count = 0
+        self.records = 0
+        self.start = None
+
+        self.file = open(path, "wb")
+        header = np.zeros(1, dtype=HEADER)
+        header[0] = (MAGIC, VERSION, legs, time.time())
+        self.file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def record(self, tick, phase, targets, clamped, alpha, beta):
+        now = self.clock()
+        if self.start is None:
+            self.start = now
+
+        row = self.buffer[self.count]
+        row["time"] = now - self.start
+        row["tick"] = tick
+        row["phase"] = phase
+        row["targets"] = targets
+        row["clamped"] = clamped
+        row["alpha"] = alpha
+        row["beta"] = beta
+
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+
+    def flush(self):
+        if self.count:
+            self.file.write(self.buffer[:self.count].tobytes())
+            self.records += self.count
+            self.count = 0
+        self.file.flush()
+
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class TelemetryLog:
+    """Memory-mapped view of a telemetry log for post-run analysis.
+
+    Every field is a read-only NumPy view into the file, indexed by record:
+    time [n], tick [n], phase [n], targets and clamped [n, legs, 2], alpha and
+    beta [n, legs].
+    """
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a telemetry log")
+        if header["version"][0] != VERSION:
+            raise ValueError(f"{path} has telemetry version {header['version'][0]}, expected {VERSION}")
+
+        self.path = path
+        self.legs = int(header["legs"][0])
+        self.start = float(header["start"][0])
+        dtype = record_dtype(self.legs)
+        count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+        self.records = (np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+                        if count else np.zeros(0, dtype=dtype))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getattr__(self, name):
+        if name in ("time", "tick", "phase", "targets", "clamped", "alpha", "beta"):
+            return self.records[name]
+        raise AttributeError(name)
+
+    """Records where at least one leg's target was out of reach"""
+    @property
+    def clamped_ticks(self):
+        return np.flatnonzero((self.targets != self.clamped).any(axis=(1, 2)))
+
+    """Ticks the scheduler skipped, from gaps in the tick numbers"""
+    @property
+    def skipped(self):
+        return int((np.diff(self.tick.astype(np.int64)) - 1).sum()) if len(self) else 0
+
+
+"""python telemetry.py run.tlm, summary of a log"""
+if __name__ == "__main__":
+    log = TelemetryLog(sys.argv[1])
+    if len(log) == 0:
+        print(f"{sys.argv[1]}: empty")
+        sys.exit(0)
+
+    period = np.diff(log.time) * 1e3
+    print(f"{sys.argv[1]}: {len(log)} records of {log.legs} legs over {log.time[-1]:.2f} s")
+    if len(period):
+        print(f"tick period  mean {period.mean():.2f} ms, max {period.max():.2f} ms, {log.skipped} ticks skipped")
+    print(f"clamped      {len(log.clamped_ticks)} records")
+    for name in ("alpha", "beta"):
+        angle = np.degrees(getattr(log, name))
+        print(f"{name:12s} {angle.min():7.1f} .. {angle.max():7.1f} deg")
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import simple_walking_mechanism_for_first as simple_walking
+from calibration import ServoCalibration
+from cli import GEOMETRIES, make_legs
+from leg_movement import LegMovement
+
+
+"""Four ticks of two legs, alpha and beta in radians"""
+ALPHA = np.radians([[10.0, -20.0], [12.0, -20.0], [14.0, -20.0], [16.0, -20.0]])
+BETA = np.radians([[90.0, 45.0], [91.0, 45.0], [92.0, 45.0], [93.0, 45.0]])
+
+
+def test_neutral_calibration_sends_the_same_frames():
+    legs = make_legs(simple_walking, GEOMETRIES["walking"][1])
+    table = simple_walking.LegMovement(legs).compile_gait()
+
+    calibration = ServoCalibration(len(legs))
+    np.testing.assert_array_equal(calibration.commands(table.alpha, table.beta),
+                                  LegMovement.commands(table.alpha, table.beta))
+
+
+def test_offset_and_direction():
+    calibration = ServoCalibration(2, offset=[[90, 90, 0], [90, 90, 0]], direction=[[1, -1, 1], [-1, 1, 1]])
+    assert calibration.commands(ALPHA[0], BETA[0]).tolist() == [100, 0, 0, 110, 135, 0]
+
+
+def test_within_limits_passes():
+    calibration = ServoCalibration(2, lower=-30, upper=100, max_velocity=100)
+    assert calibration.check(ALPHA, BETA, rate=10) == []
+    calibration.validate(ALPHA, BETA, rate=10)
+
+
+def test_limit_violations():
+    calibration = ServoCalibration(2, lower=[[-180, -180, -180], [-10, -180, -180]],
+                                   upper=[[180, 91.5, 180], [180, 180, 180]])
+    problems = calibration.check(ALPHA, BETA, rate=10)
+
+    below = [(tick, leg, joint) for kind, tick, leg, joint, _ in problems if kind == "below lower limit"]
+    above = [(tick, leg, joint) for kind, tick, leg, joint, _ in problems if kind == "above upper limit"]
+    assert below == [(tick, 1, 0) for tick in range(4)]
+    assert above == [(2, 0, 1), (3, 0, 1)]
+    with pytest.raises(ValueError, match="tick 0 leg 1 joint 0 below lower limit"):
+        calibration.validate(ALPHA, BETA, rate=10)
+
+
+def test_velocity_includes_the_wrap_to_the_first_tick():
+    # 2 degrees a tick at 10 Hz is 20 deg/s, the jump from 16 back to 10 degrees is 60 deg/s
+    calibration = ServoCalibration(2, max_velocity=30)
+    problems = calibration.check(ALPHA, BETA, rate=10)
+
+    assert [(kind, tick, leg, joint) for kind, tick, leg, joint, _ in problems] == [("too fast", 3, 0, 0)]
+    assert problems[0][-1] == pytest.approx(60)
+    assert ServoCalibration(2, max_velocity=61).check(ALPHA, BETA, rate=10) == []
+
+
+def test_save_and_load(tmp_path):
+    calibration = ServoCalibration(2, offset=[[90, 90, 0], [80, 85, 0]], max_velocity=300)
+    calibration.save(tmp_path / "servos.json")
+    loaded = ServoCalibration.load(tmp_path / "servos.json")
+    np.testing.assert_array_equal(loaded.offset, calibration.offset)
+    np.testing.assert_array_equal(loaded.max_velocity, calibration.max_velocity)
+
+
+def test_rejects_bad_fields():
+    with pytest.raises(ValueError):
+        ServoCalibration(2, direction=0.5)
+    with pytest.raises(ValueError):
+        ServoCalibration(2, lower=10, upper=0)
+    with pytest.raises(ValueError):
+        ServoCalibration(2, gain=2)
@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+import pytest
+
+from kinematics import VelocityIK, fk, ik_batch, ik_scalar
+
+
+GEOMETRIES = ((40, 40), (100, 156), (40, 55))
+
+"""Targets relative to the pivot, as fractions of the full reach arm1 + arm2"""
+CASES = {
+    "in reach": (0.5, -0.4),
+    "straight down": (0.0, -0.7),
+    "full extension": (1.0, 0.0),
+    "out of reach": (1.8, -1.2),
+    "inside the minimum reach": (0.01, 0.02),
+    "at the pivot": (0.0, 0.0),
+}
+
+
+def solve_both(x, y, pX, pY, arm1, arm2, elbow):
+    scalar = np.array(ik_batch(float(x), float(y), float(pX), float(pY), arm1, arm2, elbow))
+    batch = np.array(ik_batch(np.array([x]), np.array([y]), np.array([pX]), np.array([pY]), arm1, arm2, elbow))
+    return scalar, batch[:, 0]
+
+
+@pytest.mark.parametrize("arm1, arm2", GEOMETRIES)
+@pytest.mark.parametrize("elbow", (1, -1))
+@pytest.mark.parametrize("case", CASES)
+def test_scalar_and_batch_agree(case, elbow, arm1, arm2):
+    fx, fy = CASES[case]
+    pX, pY = 30.0, 150.0
+    scalar, batch = solve_both(pX + fx * (arm1 + arm2), pY + fy * (arm1 + arm2), pX, pY, arm1, arm2, elbow)
+
+    assert np.all(np.isfinite(scalar))
+    np.testing.assert_allclose(batch, scalar, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("arm1, arm2", GEOMETRIES)
+@pytest.mark.parametrize("elbow", (1, -1))
+def test_in_reach_wrist_hits_target(elbow, arm1, arm2):
+    x, y = 30 + 0.5 * (arm1 + arm2), 150 - 0.4 * (arm1 + arm2)
+    alpha, beta, elbowX, elbowY, wristX, wristY = ik_scalar(x, y, 30, 150, arm1, arm2, elbow)
+
+    assert (wristX, wristY) == pytest.approx((x, y), abs=1e-9)
+    assert math.copysign(1, beta) == elbow
+    assert math.hypot(elbowX - 30, elbowY - 150) == pytest.approx(arm1)
+    np.testing.assert_allclose(fk(alpha, beta, 30, 150, arm1, arm2), (elbowX, elbowY, wristX, wristY), atol=1e-9)
+
+
+@pytest.mark.parametrize("arm1, arm2", GEOMETRIES)
+def test_out_of_reach_lands_on_the_reach_circle(arm1, arm2):
+    x, y = 2.0 * (arm1 + arm2), 1.5 * (arm1 + arm2)
+    *_, wristX, wristY = ik_scalar(x, y, 0, 0, arm1, arm2)
+
+    assert math.hypot(wristX, wristY) == pytest.approx(arm1 + arm2)
+    assert math.atan2(wristY, wristX) == pytest.approx(math.atan2(y, x))
+
+
+@pytest.mark.parametrize("elbow", (1, -1))
+def test_per_leg_arrays_match_scalar_legs(elbow):
+    rng = np.random.default_rng(0)
+    pivots = np.array([[30.0, 150.0], [-30.0, 150.0], [0.0, 0.0], [10.0, -20.0]])
+    arms = np.array([[100.0, 156.0], [40.0, 40.0], [40.0, 55.0], [100.0, 156.0]])
+    pX, pY = pivots[:, :1], pivots[:, 1:]
+    arm1, arm2 = arms[:, :1], arms[:, 1:]
+    # [legs, targets], the pivots and arms are [legs, 1] and broadcast along the targets
+    x = pX + rng.uniform(-2.5, 2.5, (4, 50)) * (arm1 + arm2)
+    y = pY + rng.uniform(-2.5, 2.5, (4, 50)) * (arm1 + arm2)
+    x[:, 0], y[:, 0] = pX[:, 0], pY[:, 0]
+
+    batch = np.stack(ik_batch(x, y, pX, pY, arm1, arm2, elbow), axis=-1)
+    assert batch.shape == (4, 50, 6)
+    for leg in range(4):
+        for target in range(50):
+            scalar = ik_scalar(float(x[leg, target]), float(y[leg, target]), float(pX[leg, 0]), float(pY[leg, 0]),
+                               float(arm1[leg, 0]), float(arm2[leg, 0]), elbow)
+            np.testing.assert_allclose(batch[leg, target], scalar, rtol=0, atol=1e-9)
+
+
+"""Pivots and arms of four legs for VelocityIK, and a target path each leg can follow smoothly"""
+PIVOTS_X, PIVOTS_Y = np.array([30.0, -30.0, 0.0, 10.0]), np.array([150.0, 150.0, 0.0, -20.0])
+ARMS1, ARMS2 = np.array([100.0, 40.0, 40.0, 100.0]), np.array([156.0, 40.0, 55.0, 156.0])
+
+
+def smooth_targets(ticks=200, reach=0.5):
+    angle = -1 + 0.3 * np.sin(2 * np.pi * np.arange(ticks)[:, None] / ticks)
+    return (PIVOTS_X + reach * (ARMS1 + ARMS2) * np.cos(angle),
+            PIVOTS_Y + reach * 1.2 * (ARMS1 + ARMS2) * np.sin(angle))
+
+
+@pytest.mark.parametrize("elbow", (1, -1))
+def test_velocity_ik_tracks_the_full_solve(elbow):
+    tracker = VelocityIK(PIVOTS_X, PIVOTS_Y, ARMS1, ARMS2, elbow)
+    for x, y in zip(*smooth_targets()):
+        step = np.array(tracker.step(x, y))
+        full = np.array(ik_batch(x, y, PIVOTS_X, PIVOTS_Y, ARMS1, ARMS2, elbow))
+        np.testing.assert_allclose(step[:2], full[:2], atol=1e-4)
+        np.testing.assert_allclose(step[2:], full[2:], atol=1e-2)
+    assert tracker.fallbacks == 0
+
+
+def test_velocity_ik_falls_back_near_full_extension():
+    tracker = VelocityIK(PIVOTS_X, PIVOTS_Y, ARMS1, ARMS2, margin=0.02)
+    x, y = smooth_targets(reach=0.7)
+    tracker.reset(x[0], y[0])
+
+    # Legs 0 and 2 are pushed within 1% of full extension, inside the 2% margin
+    x1, y1 = x[1].copy(), y[1].copy()
+    for leg in (0, 2):
+        scale = 0.99 * (ARMS1[leg] + ARMS2[leg]) / np.hypot(x1[leg] - PIVOTS_X[leg], y1[leg] - PIVOTS_Y[leg])
+        x1[leg] = PIVOTS_X[leg] + (x1[leg] - PIVOTS_X[leg]) * scale
+        y1[leg] = PIVOTS_Y[leg] + (y1[leg] - PIVOTS_Y[leg]) * scale
+    step = np.array(tracker.step(x1, y1))
+
+    assert tracker.fallbacks == 2
+    full = np.array(ik_batch(x1, y1, PIVOTS_X, PIVOTS_Y, ARMS1, ARMS2))
+    np.testing.assert_array_equal(step[:, [0, 2]], full[:, [0, 2]])
+
+    # Out of reach is solved fully as well, the wrist lands on the reach circle
+    tracker.step(PIVOTS_X + 2 * (ARMS1 + ARMS2), PIVOTS_Y)
+    assert tracker.fallbacks == 6
+
+
+def test_velocity_ik_falls_back_on_large_jumps():
+    tracker = VelocityIK(PIVOTS_X, PIVOTS_Y, ARMS1, ARMS2, max_step=0.2)
+    x, y = smooth_targets(ticks=4)
+    tracker.reset(x[0], y[0])
+    # A quarter of the path in one tick, the joints turn by more than max_step radians
+    step = np.array(tracker.step(x[1], y[1]))
+
+    assert tracker.fallbacks == 4
+    np.testing.assert_allclose(step, ik_batch(x[1], y[1], PIVOTS_X, PIVOTS_Y, ARMS1, ARMS2))
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import simple_crawling
+import simple_walking_mechanism_for_first as simple_walking
+from cli import GEOMETRIES, make_legs
+
+
+@pytest.mark.parametrize("module", (simple_crawling, simple_walking))
+@pytest.mark.parametrize("swing_steps, stance_steps", ((30, 30), (49, 24), (10, 60)))
+def test_gait_cycle_has_no_jumps(module, swing_steps, stance_steps):
+    legs = make_legs(module, GEOMETRIES["crawling"][1])
+    for leg in legs:
+        leg.swing_steps, leg.stance_steps = swing_steps, stance_steps
+    footX, footY, pivotX, pivotY = module.LegMovement(legs).gait_cycle()
+
+    assert footX.shape == (4, 4 * swing_steps)
+    # The cycloid's fastest step is 2 step lengths over the swing, nothing may move faster,
+    # including the step from the last tick back to the first
+    fastest = 2 * module.STEP_LENGTH / (swing_steps - 1)
+    assert np.abs(np.roll(footX, -1, axis=1) - footX).max() <= fastest + 1e-9
+    # One leg swings at a time, every swing and every stance runs to its end
+    swinging = footY > legs[0].y0 + legs[0].bob + 1e-9
+    assert swinging.sum(axis=0).max() <= 1
+    assert footX.max() == pytest.approx(legs[0].x0 + module.STEP_LENGTH)
+    assert footX.min() == pytest.approx(legs[0].x0)
+
+
+@pytest.mark.parametrize("rate", (50, 200, 300))
+def test_gait_file_keeps_the_cycle_duration_at_any_rate(tmp_path, rate):
+    from trajectory_file import GaitPlayback, compile_gait_file
+
+    legs = make_legs(simple_walking, GEOMETRIES["walking"][1])
+    compile_gait_file(tmp_path / "100.gait", simple_walking.LegMovement(legs), rate=100)
+    compile_gait_file(tmp_path / "other.gait", simple_walking.LegMovement(legs), rate=rate)
+    native, other = GaitPlayback(tmp_path / "100.gait"), GaitPlayback(tmp_path / "other.gait")
+
+    assert len(other) / other.rate == pytest.approx(len(native) / native.rate)
+    # Ticks falling on the native ones are the native frames, the others lie between them
+    step = len(native) // np.gcd(len(native), len(other))
+    every = len(other) // np.gcd(len(native), len(other))
+    np.testing.assert_allclose(other.joints[::every], native.joints[::step], atol=1e-9)
@@ -0,0 +1,93 @@
+import pytest
+
+from scheduler import FixedRateScheduler
+
+
+class FakeClock:
+    """Clock and sleep for a scheduler, time only moves when slept or worked"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, interval):
+        self.sleeps.append(interval)
+        self.now += interval
+
+    def work(self, duration):
+        self.now += duration
+
+
+"""8 Hz, so periods and deadlines are exact in binary floating point"""
+def make_scheduler(policy="skip", **options):
+    clock = FakeClock()
+    return FixedRateScheduler(8, policy, clock=clock, sleep=clock.sleep, **options), clock
+
+
+def test_deadlines_are_absolute():
+    scheduler, clock = make_scheduler()
+    scheduler.start()
+    for work in (0.0, 0.05, 0.1, 0.02):
+        clock.work(work)
+        assert scheduler.wait() == 1
+    # Time spent in a tick shortens the sleep instead of shifting the next deadline
+    assert clock.sleeps == pytest.approx([0.125, 0.075, 0.025, 0.105])
+    assert clock.now == pytest.approx(100.5)
+    assert scheduler.overruns == 0
+
+
+def test_skip_jumps_over_missed_deadlines():
+    scheduler, clock = make_scheduler()
+    scheduler.start()
+    clock.work(0.125 * 3.5)
+    assert scheduler.wait() == 3
+    assert (scheduler.overruns, scheduler.skipped, scheduler.resyncs) == (1, 2, 0)
+    # Back on the grid of deadlines, the next tick sleeps until start + 4 periods
+    assert scheduler.wait() == 1
+    assert clock.now == 100.5
+
+
+def test_catch_up_runs_missed_ticks_back_to_back():
+    scheduler, clock = make_scheduler("catch_up")
+    scheduler.start()
+    clock.work(0.125 * 3.5)
+    steps = [scheduler.wait() for _ in range(4)]
+    assert steps == [1, 1, 1, 1]
+    # Three ticks run late without sleeping, the fourth waits for its deadline again
+    assert clock.sleeps == [0.0, 0.0, 0.0, 0.0625]
+    assert (scheduler.overruns, scheduler.skipped, scheduler.resyncs) == (2, 0, 0)
+    assert clock.now == 100.5
+
+
+def test_catch_up_resyncs_when_too_far_behind():
+    scheduler, clock = make_scheduler("catch_up", max_catch_up=5)
+    scheduler.start()
+    clock.work(0.125 * 7.5)
+    # Six deadlines missed, one more than max_catch_up, so the ticks are skipped instead
+    assert scheduler.wait() == 7
+    assert (scheduler.overruns, scheduler.skipped, scheduler.resyncs) == (1, 6, 1)
+    assert scheduler.wait() == 1
+    assert clock.now == 101.0
+
+
+def test_stats():
+    scheduler, clock = make_scheduler(history=4)
+    scheduler.start()
+    for work in (0.0, 0.0, 0.3, 0.0, 0.0, 0.0):
+        clock.work(work)
+        scheduler.wait()
+
+    stats = scheduler.stats()
+    assert stats["ticks"] == 6 and stats["skipped"] == 1 and stats["overruns"] == 1
+    assert stats["achieved_rate"] == pytest.approx(6 / (clock.now - 100))
+    # Only the last four wake-ups are kept, the late one among them
+    assert stats["jitter_max"] == pytest.approx(0.3 - 0.125)
+    assert stats["jitter_mean"] == pytest.approx((0.3 - 0.125) / 4)
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        FixedRateScheduler(100, "drop")
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import crawling_mechanism
+import simple_crawling
+
+
+def make_leg(module=simple_crawling):
+    return module.WalkingMechanism(module.LEG1, module.LEG2, module.PIVOTx, module.PIVOTy, module.START,
+                                   module.STEP_LENGTH)
+
+
+"""Position at t and velocity just after it, by a finite difference"""
+def state(planner, t, dt=1e-6):
+    x, y = planner.at(np.array([t, t + dt]))
+    points = np.stack([x, y], axis=-1)
+    return points[0], (points[1] - points[0]) / dt
+
+
+@pytest.mark.parametrize("t", (0.07, 0.29, 0.45, 0.6))
+def test_replan_keeps_position_and_velocity(t):
+    leg = make_leg()
+    planner = leg.foot_planner(blend_time=0.1)
+    position, velocity = state(planner, t)
+
+    leg.retarget(t, step_length=35)
+    new_position, new_velocity = state(planner, t)
+    np.testing.assert_allclose(new_position, position, atol=1e-6)
+    np.testing.assert_allclose(new_velocity, velocity, rtol=1e-3, atol=1e-2)
+
+    # Once the blend is over the foot is on the new curve, at the same point of the cycle
+    later = t + 0.25
+    x, y = planner.at(later)
+    target = planner.trajectory.at(later - planner.epoch)
+    np.testing.assert_allclose((x, y), target, atol=1e-9)
+
+
+def test_replan_during_a_blend_stays_continuous():
+    leg = make_leg()
+    planner = leg.foot_planner(blend_time=0.2)
+    for t, step_length in ((0.1, 30), (0.15, 10), (0.2, 25)):
+        position, velocity = state(planner, t)
+        leg.retarget(t, step_length=step_length)
+        new_position, new_velocity = state(planner, t)
+        np.testing.assert_allclose(new_position, position, atol=1e-6)
+        np.testing.assert_allclose(new_velocity, velocity, rtol=1e-3, atol=1e-2)
+
+
+@pytest.mark.parametrize("module", (simple_crawling, crawling_mechanism))
+def test_trajectory_cache_is_bounded(module):
+    leg = make_leg(module)
+    leg.foot_planner()
+    for i in range(5000):
+        if module is simple_crawling:
+            leg.retarget(i * 0.01, step_length=10 + (i % 997) * 0.01)
+        else:
+            leg.step_lengthX = 10 + (i % 997) * 0.01
+            leg.foot_trajectory()
+    assert len(leg.trajectories) == leg.TRAJECTORY_CACHE
+
+    # The most recent trajectory is served from the cache, not rebuilt
+    assert leg.foot_trajectory() is leg.foot_trajectory()
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from transmitter import Transmitter
+
+
+class GatedPort:
+    """Port whose writes hang until released, like a slow serial link"""
+
+    def __init__(self, error=None):
+        self.data = []
+        self.error = error
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, data):
+        self.writing.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        self.data.append(data)
+
+
+class FailingPort:
+    def write(self, data):
+        raise BrokenPipeError("reader went away")
+
+
+"""Frame i of a run, each a distinct 4 byte frame"""
+def frame(i):
+    return i.to_bytes(4, "little")
+
+
+def test_frames_arrive_in_order_with_counters():
+    port = GatedPort()
+    port.release.set()
+    transmitter = Transmitter(port).start()
+    for i in range(100):
+        transmitter.write(frame(i))
+    transmitter.close()
+
+    assert b"".join(port.data) == b"".join(frame(i) for i in range(100))
+    stats = transmitter.stats()
+    assert stats["sent"] == 100 and stats["bytes_sent"] == 400 and stats["dropped"] == 0
+    assert stats["writes"] == len(port.data) and stats["depth"] == 0
+    assert 1 <= stats["max_depth"] <= transmitter.maxsize
+
+
+def test_drop_oldest_keeps_the_newest_frames():
+    port = GatedPort()
+    transmitter = Transmitter(port, maxsize=3, policy="drop_oldest").start()
+    transmitter.write(frame(0))
+    assert port.writing.wait(5)
+    # Frame 0 is stuck in the port, the queue only keeps the three newest of the rest
+    for i in range(1, 11):
+        transmitter.write(frame(i))
+    assert transmitter.dropped == 7 and transmitter.depth == 3
+
+    port.release.set()
+    transmitter.close()
+    assert b"".join(port.data) == b"".join(frame(i) for i in (0, 8, 9, 10))
+    assert transmitter.stats()["sent"] == 4
+
+
+def test_block_waits_for_room_and_loses_nothing():
+    port = GatedPort()
+    transmitter = Transmitter(port, maxsize=2, policy="block").start()
+    transmitter.write(frame(0))
+    assert port.writing.wait(5)
+
+    producer = threading.Thread(target=lambda: [transmitter.write(frame(i)) for i in range(1, 6)])
+    producer.start()
+    producer.join(0.2)
+    # The queue is full and the port is stuck, so the producer waits instead of dropping
+    assert producer.is_alive() and transmitter.blocked == 1 and transmitter.depth == 2
+
+    port.release.set()
+    producer.join(5)
+    transmitter.close()
+    assert b"".join(port.data) == b"".join(frame(i) for i in range(6))
+    assert transmitter.dropped == 0
+
+
+def test_port_error_is_raised_by_write_and_close():
+    transmitter = Transmitter(FailingPort()).start()
+    transmitter.write(frame(0))
+    transmitter.thread.join(5)
+
+    with pytest.raises(BrokenPipeError):
+        transmitter.write(frame(1))
+    with pytest.raises(BrokenPipeError):
+        transmitter.close()
+    assert transmitter.sent == 0
+
+
+def test_port_error_wakes_a_blocked_producer():
+    port = GatedPort(BrokenPipeError("reader went away"))
+    transmitter = Transmitter(port, maxsize=1, policy="block").start()
+    transmitter.write(frame(0))
+    assert port.writing.wait(5)
+    transmitter.write(frame(1))
+
+    errors = []
+
+    def produce():
+        try:
+            transmitter.write(frame(2))
+        except OSError as error:
+            errors.append(error)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    producer.join(0.2)
+    assert producer.is_alive()
+
+    # The stuck write fails while the queue is still full, the producer must not wait forever
+    port.release.set()
+    producer.join(5)
+    assert not producer.is_alive() and isinstance(errors[0], BrokenPipeError)
+    with pytest.raises(BrokenPipeError):
+        transmitter.close()
+
+
+def test_write_after_close_raises():
+    transmitter = Transmitter(GatedPort(), policy="drop_oldest").start()
+    transmitter.close()
+    with pytest.raises(ValueError):
+        transmitter.write(frame(0))
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Transmitter(GatedPort(), policy="drop_newest")
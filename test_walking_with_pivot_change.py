@@ -0,0 +1,67 @@
+import math
+from itertools import islice
+
+import numpy as np
+import pytest
+
+from walking_with_pivot_change import FootstepPlanner
+
+
+def take_steps(planner, steps):
+    ticks = planner.swing_steps + planner.stance_steps
+    return np.array(list(islice(planner.ticks(), steps * ticks))).reshape(steps, ticks, 5)
+
+
+def test_each_step_swings_then_stands():
+    planner = FootstepPlanner(velocity=20, heading=math.radians(30), swing_steps=10, stance_steps=15)
+    start_foot, start_pivot = planner.foot, planner.pivot
+    step = take_steps(planner, 1)[0]
+    swing, stance = step[:10], step[10:]
+    dx, dy = planner.step_length * math.cos(math.radians(30)), planner.step_length * math.sin(math.radians(30))
+    end_foot = (start_foot[0] + dx, start_foot[1] + dy)
+    end_pivot = (start_pivot[0] + dx, start_pivot[1] + dy)
+
+    # The foot swings from where it stood to the planned footstep while the pivot waits
+    np.testing.assert_allclose(swing[0, :2], start_foot)
+    np.testing.assert_allclose(swing[-1, :2], end_foot)
+    np.testing.assert_allclose(swing[:, 2:4], np.tile(start_pivot, (10, 1)))
+    np.testing.assert_allclose(swing[:, 4], start_pivot[1])
+
+    # Then the foot stands while the pivot moves over it, bobbing above its level
+    np.testing.assert_allclose(stance[:, :2], np.tile(end_foot, (15, 1)))
+    np.testing.assert_allclose(stance[[0, -1], 2:4], [start_pivot, end_pivot])
+    np.testing.assert_allclose(stance[:, 4], np.linspace(start_pivot[1], end_pivot[1], 15))
+    assert np.all(stance[1:-1, 3] > stance[1:-1, 4])
+    assert planner.foot == pytest.approx(end_foot) and planner.pivot == pytest.approx(end_pivot)
+
+
+def test_steps_continue_where_the_last_one_ended():
+    planner = FootstepPlanner(swing_steps=8, stance_steps=12)
+    steps = take_steps(planner, 4)
+
+    np.testing.assert_allclose(steps[1:, 0, :2], steps[:-1, -1, :2])
+    np.testing.assert_allclose(steps[1:, 0, 2:4], steps[:-1, -1, 2:4])
+    np.testing.assert_allclose(steps[-1, -1, 2], 50 + 4 * planner.step_length)
+
+
+def test_command_takes_effect_on_the_next_step():
+    planner = FootstepPlanner(velocity=10, swing_steps=5, stance_steps=5)
+    ticks = planner.ticks()
+    first = [next(ticks) for _ in range(3)]
+    # Commanded mid-swing, the step already planned keeps its length
+    planner.command(-10, math.pi / 2)
+    rest = np.array([next(ticks) for _ in range(17)])
+    first_step = np.vstack([first, rest[:7]])
+    second_step = rest[7:]
+
+    assert first_step[-1, 2] - first_step[0, 2] == pytest.approx(planner.step_length)
+    assert first_step[-1, 3] == pytest.approx(first_step[0, 3])
+    # Backwards at 90 degrees is straight down
+    assert second_step[-1, 3] - second_step[0, 3] == pytest.approx(-planner.step_length)
+    assert second_step[-1, 2] == pytest.approx(second_step[0, 2])
+
+
+def test_steps_are_capped_in_reach():
+    planner = FootstepPlanner(velocity=1000, max_step=25)
+    step = take_steps(planner, 1)[0]
+    assert step[-1, 2] - step[0, 2] == pytest.approx(25)
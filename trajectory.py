@@ -0,0 +1,210 @@
+from functools import partial
+
+import numpy as np
+
+from gait_engine import stance_curve, swing_curve
+
+
+class Segment:
+    """One stretch of a foot path lasting duration seconds.
+
+    curve maps progress s in [0, 1] to x, y arrays. Analytic segments keep
+    only their parameters and spline segments their keyframes, so nothing is
+    sampled until a rate is asked for.
+    """
+
+    def __init__(self, duration, curve):
+        if duration <= 0:
+            raise ValueError(f"duration must be positive, got {duration}")
+        self.duration = duration
+        self.curve = curve
+
+    def sample(self, s):
+        return self.curve(np.asarray(s, dtype=float))
+
+    """Compressing the segment into a spline through keyframes evenly spaced in progress"""
+    def to_spline(self, keyframes=8):
+        s = np.linspace(0, 1, keyframes)
+        x, y = self.sample(s)
+        return Segment(self.duration, SplineCurve(s, x, y))
+
+
+class SplineCurve:
+    """Cubic Hermite spline through keyframes, tangents from neighbouring keyframes (Catmull-Rom)."""
+
+    def __init__(self, knots, x, y):
+        self.knots = np.asarray(knots, dtype=float)
+        self.points = np.stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)], axis=-1)
+        if len(self.knots) < 2 or len(self.knots) != len(self.points):
+            raise ValueError("A spline needs at least two keyframes and one knot per keyframe")
+        self.tangents = np.gradient(self.points, self.knots, axis=0)
+
+    def __call__(self, s):
+        i = np.clip(np.searchsorted(self.knots, s, side="right") - 1, 0, len(self.knots) - 2)
+        h = self.knots[i + 1] - self.knots[i]
+        u = ((s - self.knots[i]) / h)[..., None]
+        h = h[..., None]
+
+        h00 = 2 * u**3 - 3 * u**2 + 1
+        h10 = u**3 - 2 * u**2 + u
+        h01 = -2 * u**3 + 3 * u**2
+        h11 = u**3 - u**2
+        p = (h00 * self.points[i] + h10 * h * self.tangents[i]
+             + h01 * self.points[i + 1] + h11 * h * self.tangents[i + 1])
+        return p[..., 0], p[..., 1]
+
+
+"""Cyclodial swing of WalkingMechanism.cycloidal_between"""
+def swing_segment(duration, x0, y0, step_length, lift_ratio=0.5):
+    return Segment(duration, partial(swing_curve, x0=x0, y0=y0, step_length=step_length, lift_ratio=lift_ratio))
+
+
+"""Bobbing stance of WalkingMechanism.stance_phase_fixed_pivot"""
+def stance_segment(duration, x0, y0, step_length, bob=3):
+    return Segment(duration, partial(stance_curve, x0=x0, y0=y0, step_length=step_length, bob=bob))
+
+
+def _ellipse(s, x, y, step_x, step_y):
+    theta = np.pi * (1 - s)
+    return x + (step_x / 2) * np.cos(theta), y + step_y * np.sin(theta)
+
+
+def _line(s, start, end):
+    return start[0] + (end[0] - start[0]) * s, start[1] + (end[1] - start[1]) * s
+
+
+"""Half ellipse swing of crawling_mechanism's elliptical_path"""
+def elliptical_segment(duration, x, y, step_x, step_y):
+    return Segment(duration, partial(_ellipse, x=x, y=y, step_x=step_x, step_y=step_y))
+
+
+def line_segment(duration, start, end):
+    return Segment(duration, partial(_line, start=start, end=end))
+
+
+"""Spline through foot positions, knots default to evenly spaced progress"""
+def spline_segment(duration, x, y, knots=None):
+    knots = np.linspace(0, 1, len(x)) if knots is None else knots
+    return Segment(duration, SplineCurve(knots, x, y))
+
+
+class Trajectory:
+    """Segments played back to back, sampled at any time or control rate.
+
+    at(t) evaluates the curves at arbitrary times, looping over the total
+    duration. resample(rate) gives one period at a control rate and is
+    computed the first time each rate is asked for, then served from a cache
+    as read-only arrays. Changing speed means changing durations, not
+    sample counts.
+    """
+
+    def __init__(self, segments, loop=True):
+        self.segments = list(segments)
+        self.loop = loop
+        self.starts = np.cumsum([0.0] + [segment.duration for segment in self.segments])
+        self.cache = {}
+
+    @property
+    def duration(self):
+        return self.starts[-1]
+
+    def __len__(self):
+        return len(self.segments)
+
+    def at(self, t):
+        t = np.asarray(t, dtype=float)
+        t = np.mod(t, self.duration) if self.loop else np.clip(t, 0, self.duration)
+        index = np.clip(np.searchsorted(self.starts, t, side="right") - 1, 0, len(self.segments) - 1)
+
+        x, y = np.empty_like(t), np.empty_like(t)
+        for i, segment in enumerate(self.segments):
+            mask = index == i
+            if mask.any():
+                x[mask], y[mask] = segment.sample((t[mask] - self.starts[i]) / segment.duration)
+        return x, y
+
+    """One period sampled at rate Hz, the ticks at 0, 1 / rate, ... before the period ends"""
+    def resample(self, rate):
+        rate = float(rate)
+        if rate not in self.cache:
+            x, y = self.at(np.arange(int(round(self.duration * rate))) / rate)
+            x.flags.writeable = y.flags.writeable = False
+            self.cache[rate] = x, y
+        return self.cache[rate]
+
+    """Samples from t0 up to t1 at rate Hz, e.g. the next few ticks of a running gait"""
+    def window(self, t0, t1, rate):
+        return self.at(t0 + np.arange(int(round((t1 - t0) * rate))) / rate)
+
+
+
+
+"""Hermite weights fading a position and a velocity offset out as u goes 0 to 1 over span, and their rates"""
+def _fade(u, span):
+    h00, h10 = 2 * u**3 - 3 * u**2 + 1, (u**3 - 2 * u**2 + u) * span
+    return h00, h10, (6 * u**2 - 6 * u) / span, 3 * u**2 - 4 * u + 1
+
+
+"""Position and velocity per second of a segment at progress s, from just after s"""
+def _segment_state(segment, s, ds=1e-6):
+    x, y = segment.sample(np.array([s, s + ds]))
+    return np.array([x[0], y[0]]), np.array([x[1] - x[0], y[1] - y[0]]) / (ds * segment.duration)
+
+
+class TrajectoryPlanner:
+    """Plays a looping Trajectory at absolute times and switches to a new one mid-cycle.
+
+    replan(t, trajectory) keeps the cycle position: the new trajectory
+    carries on from the same progress through the segment playing at t.
+    The difference in position and velocity between the old and new path
+    at t fades out over blend_time seconds with cubic Hermite weights, so
+    the foot moves on continuously in both, whichever segment boundaries
+    the blend crosses. Replanning samples two segments at two points, the
+    new trajectory's segments and resample cache are reused as they are,
+    so a WalkingMechanism.foot_trajectory() seen before costs nothing.
+    """
+
+    def __init__(self, trajectory, blend_time=0.1, start=0.0):
+        self.trajectory = trajectory
+        self.blend_time = blend_time
+        self.epoch = start
+        self.blend = None
+
+    def at(self, t):
+        t = np.asarray(t, dtype=float)
+        x, y = self.trajectory.at(t - self.epoch)
+        if self.blend is not None:
+            start, offset, slope_offset = self.blend
+            u = np.clip((t - start) / self.blend_time, 0, 1)
+            h00, h10 = _fade(u, self.blend_time)[:2]
+            inside = t >= start
+            x = x + np.where(inside, h00 * offset[0] + h10 * slope_offset[0], 0)
+            y = y + np.where(inside, h00 * offset[1] + h10 * slope_offset[1], 0)
+        return x, y
+
+    """Segment index and progress through it at time t"""
+    def locate(self, t):
+        trajectory = self.trajectory
+        local = (t - self.epoch) % trajectory.duration
+        i = min(int(np.searchsorted(trajectory.starts, local, side="right")) - 1, len(trajectory) - 1)
+        return i, (local - trajectory.starts[i]) / trajectory.segments[i].duration
+
+
+    def replan(self, t, trajectory):
+        if len(trajectory) != len(self.trajectory):
+            raise ValueError(f"Replanning needs the same segments, got {len(trajectory)} for {len(self.trajectory)}")
+
+        i, s0 = self.locate(t)
+        position, velocity = _segment_state(self.trajectory.segments[i], s0)
+        if self.blend is not None and t < self.blend[0] + self.blend_time:
+            start, offset, slope_offset = self.blend
+            h00, h10, d00, d10 = _fade((t - start) / self.blend_time, self.blend_time)
+            position = position + h00 * offset + h10 * slope_offset
+            velocity = velocity + d00 * offset + d10 * slope_offset
+
+        segment = trajectory.segments[i]
+        new_position, new_velocity = _segment_state(segment, s0)
+        self.trajectory = trajectory
+        self.epoch = t - (trajectory.starts[i] + s0 * segment.duration)
+        self.blend = (t, position - new_position, velocity - new_velocity)
+        return self
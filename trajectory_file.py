@@ -0,0 +1,135 @@
+import sys
+
+import numpy as np
+
+from scheduler import FixedRateScheduler
+
+
+"""Compiled gait files
+
+A 64 byte header followed by one fixed-size record per control tick:
+
+    magic    4 bytes  b"GAIT"
+    version  uint16
+    legs     uint16
+    frames   uint32
+    rate     float64  control frequency the frames were sampled for
+    cycles   uint32   gait cycles in the file
+    padding  up to 64 bytes
+
+Records hold the time, foot targets [legs, 2], pivots [legs, 2] and joint
+state [legs, 6] (alpha, beta, elbowX, elbowY, wristX, wristY), all float64
+and little endian. The file is memory-mapped for playback, so nothing is
+solved at runtime and replaying costs only the page reads.
+"""
+MAGIC = b"GAIT"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("legs", "<u2"), ("frames", "<u4"),
+                   ("rate", "<f8"), ("cycles", "<u4")])
+
+
+def record_dtype(legs):
+    return np.dtype([("time", "<f8"), ("targets", "<f8", (legs, 2)), ("pivots", "<f8", (legs, 2)),
+                     ("joints", "<f8", (legs, 6))])
+
+
+"""Writing a compiled GaitTable repeated over a number of cycles, its frames are rate Hz apart"""
+def write_gait_file(path, table, cycles=1, rate=100):
+    legs = table.frames.shape[1]
+    frames = len(table) * cycles
+
+    header = np.zeros(1, dtype=HEADER)
+    header[0] = (MAGIC, VERSION, legs, frames, rate, cycles)
+    records = np.zeros(frames, dtype=record_dtype(legs))
+    records["time"] = np.arange(frames) / rate
+    records["targets"] = np.tile(table.targets, (cycles, 1, 1))
+    records["pivots"] = np.tile(table.pivots, (cycles, 1, 1))
+    records["joints"] = np.tile(table.frames, (cycles, 1, 1))
+
+    with open(path, "wb") as f:
+        f.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        f.write(records.tobytes())
+
+
+"""Compiling the gait of a LegMovement straight to a file, sampled for a control rate of rate Hz.
+The table has one frame per tick at the movement's own frequency, so the cycle keeps its duration
+and only the number of frames changes"""
+def compile_gait_file(path, movement, cycles=1, rate=None):
+    frequency = movement.scheduler.frequency
+    rate = frequency if rate is None else rate
+    table = movement.compile_gait()
+    write_gait_file(path, table.resample(max(2, int(round(len(table) * rate / frequency)))), cycles, rate)
+
+
+def read_header(path):
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a compiled gait file")
+    if header["version"][0] != VERSION:
+        raise ValueError(f"{path} has gait file version {header['version'][0]}, expected {VERSION}")
+    return header[0]
+
+
+class GaitPlayback:
+    """Memory-mapped view of a compiled gait file.
+
+    time, targets, pivots and joints are read-only views into the file, frame(i)
+    wraps around so the gait can be replayed for as long as needed.
+    """
+
+    def __init__(self, path):
+        header = read_header(path)
+        self.path = path
+        self.legs = int(header["legs"])
+        self.rate = float(header["rate"])
+        self.cycles = int(header["cycles"])
+        self.records = np.memmap(path, dtype=record_dtype(self.legs), mode="r",
+                                 offset=HEADER_SIZE, shape=(int(header["frames"]),))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def time(self):
+        return self.records["time"]
+
+    @property
+    def targets(self):
+        return self.records["targets"]
+
+    @property
+    def pivots(self):
+        return self.records["pivots"]
+
+    @property
+    def joints(self):
+        return self.records["joints"]
+
+    def frame(self, tick):
+        return self.records[tick % len(self)]
+
+
+    """Streaming frames at the rate they were compiled for, forever unless loop is False"""
+    def stream(self, scheduler=None, loop=True):
+        scheduler = FixedRateScheduler(self.rate) if scheduler is None else scheduler
+        tick = 0
+        scheduler.start()
+
+        while loop or tick < len(self):
+            yield self.frame(tick)
+            tick += scheduler.wait()
+
+
+"""python trajectory_file.py out.gait [cycles] [rate], compiles the 100/156 walking geometry"""
+if __name__ == "__main__":
+    import simple_walking_mechanism_for_first as walking
+
+    path = sys.argv[1]
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    legs = [walking.WalkingMechanism(walking.LEG1, walking.LEG2, walking.PIVOTx, walking.PIVOTy,
+                                     walking.START, walking.STEP_LENGTH, offset=offset) for offset in (0, 1, 1, 0)]
+    compile_gait_file(path, walking.LegMovement(legs), cycles, rate)
+    print(f"{path}: {len(GaitPlayback(path))} frames at {rate:g} Hz")
@@ -0,0 +1,129 @@
+import collections
+import threading
+
+
+class Transmitter:
+    """Writes frames to a port from a background thread.
+
+    The port is anything with write(bytes): a file, a pipe, sys.stdout.buffer
+    or a serial port. Transmitter has write() itself, so it can stand in for
+    the port and the control loop only pays for an append to the queue. Frames
+    waiting in the bounded queue are sent together in one write. When the
+    queue is full, policy "block" makes the producer wait and "drop_oldest"
+    throws away the stalest frame, which is usually what servos want.
+
+    An error writing to the port stops the thread, and is raised again from
+    the next write() or from close(). Writes after close() raise too.
+    """
+
+    def __init__(self, port, maxsize=64, policy="block"):
+        if policy not in ("block", "drop_oldest"):
+            raise ValueError(f"Unknown policy {policy!r}, expected 'block' or 'drop_oldest'")
+
+        self.port = port
+        self.maxsize = maxsize
+        self.policy = policy
+        self.queue = collections.deque()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.closed = False
+        self.error = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.bytes_sent = 0
+        self.writes = 0
+        self.max_depth = 0
+
+
+    @property
+    def depth(self):
+        return len(self.queue)
+
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="transmitter", daemon=True)
+        self.thread.start()
+        return self
+
+
+    def write(self, frame):
+        with self.condition:
+            self.check()
+            if len(self.queue) >= self.maxsize:
+                if self.policy == "drop_oldest":
+                    self.queue.popleft()
+                    self.dropped += 1
+                else:
+                    self.blocked += 1
+                    self.condition.wait_for(lambda: len(self.queue) < self.maxsize or not self.running)
+                    self.check()
+
+            self.queue.append(frame)
+            self.max_depth = max(self.max_depth, len(self.queue))
+            self.condition.notify_all()
+        return len(frame)
+
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or not self.running)
+                if not self.queue:
+                    return
+                frames = list(self.queue)
+                self.queue.clear()
+                self.condition.notify_all()
+
+            # The lock is released here, so the next frames are computed while these are sent
+            data = b"".join(frames)
+            try:
+                self.port.write(data)
+                if hasattr(self.port, "flush"):
+                    self.port.flush()
+            except Exception as error:
+                # A broken pipe or a serial port that went away, producers waiting on the queue are woken
+                with self.condition:
+                    self.error = error
+                    self.running = False
+                    self.condition.notify_all()
+                return
+
+            self.sent += len(frames)
+            self.bytes_sent += len(data)
+            self.writes += 1
+
+
+    """Raising the port's error, or refusing frames once closed, called with the lock held"""
+    def check(self):
+        if self.error is not None:
+            raise self.error
+        if self.closed:
+            raise ValueError("write to a closed Transmitter")
+
+
+    """Stopping the thread, whatever is still queued is sent first"""
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "writes": self.writes,
+            "bytes_sent": self.bytes_sent,
+        }
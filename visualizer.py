@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class BlitManager:
+    """Redraws only the animated artists on top of a cached background.
+
+    The background is captured again on every full draw (resize, slider
+    moves), canvases without blitting support fall back to draw_idle. bbox
+    limits the blit to one axis, e.g. ax.bbox, so managers of different
+    axes of one figure do not wipe each other's artists.
+    """
+
+    def __init__(self, canvas, artists=(), bbox=None):
+        self.canvas = canvas
+        self.bbox = canvas.figure.bbox if bbox is None else bbox
+        self.blit = canvas.supports_blit
+        self.background = None
+        self.artists = []
+
+        for artist in artists:
+            self.add_artist(artist)
+        self.cid = canvas.mpl_connect("draw_event", self.on_draw)
+
+    def add_artist(self, artist):
+        artist.set_animated(self.blit)
+        self.artists.append(artist)
+
+    def on_draw(self, event):
+        if self.blit:
+            self.background = self.canvas.copy_from_bbox(self.bbox)
+            self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.artists:
+            self.canvas.figure.draw_artist(artist)
+
+    def update(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.bbox)
+        self.canvas.flush_events()
+
+
+class LegArtists:
+    """Arm, forearm, foot marker and readout of one leg, created once per axis."""
+
+    def __init__(self, ax, floor=90, xlim=(0, 200), ylim=(0, 200), readout=True):
+        self.arm, = ax.plot([], [], 'ro-', linewidth=4, label='Arm')
+        self.forearm, = ax.plot([], [], 'ro-', linewidth=4)
+        self.foot, = ax.plot([], [], 'gx', markersize=10, label='Foot')
+        self.text = ax.text(0, 180, "") if readout else None
+        if floor is not None:
+            ax.axhline(floor, color='gray', linestyle='--')
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+        ax.set_aspect('equal')
+        ax.legend()
+
+    @property
+    def artists(self):
+        lines = [self.arm, self.forearm, self.foot]
+        return lines if self.text is None else lines + [self.text]
+
+    def set(self, x, y, pX, pY, alpha, beta, elbowX, elbowY, wristX, wristY):
+        self.arm.set_data([pX, elbowX], [pY, elbowY])
+        self.forearm.set_data([elbowX, wristX], [elbowY, wristY])
+        self.foot.set_data([x], [y])
+        if self.text is not None:
+            self.text.set_text(f"x: {x:.2f}, y: {y:.2f}\nα: {np.rad2deg(alpha):.1f}, β: {np.rad2deg(beta):.1f}")
+
+
+class LegVisualizer:
+    """Grid of leg views, 2x2 by default, fed with joint state by LegMovement.
+
+    matplotlib is only imported when a visualizer is created, so the gait
+    and IK code never touches it when running headless. Text rendering is
+    the most expensive part of a frame, readout=False drops the angle text.
+    """
+
+    def __init__(self, floor=90, xlim=(0, 200), ylim=(0, 200), figsize=None,
+                 axes_order=None, readout=True, shape=(2, 2)):
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        self.fig, ax = plt.subplots(*shape, figsize=figsize, squeeze=False)
+        if axes_order is None:
+            axes_order = [(row, col) for row in range(shape[0]) for col in range(shape[1])]
+        self.axes = [ax[row][col] for row, col in axes_order]
+        self.legs = [LegArtists(a, floor, xlim, ylim, readout) for a in self.axes]
+        self.blitter = BlitManager(self.fig.canvas, [a for leg in self.legs for a in leg.artists])
+
+
+    """Joint state subscriber, frame is [legs, 6] and pivots is [legs, 2]"""
+    def update(self, frame, pivots):
+        for leg, joints, (pX, pY) in zip(self.legs, frame, pivots):
+            alpha, beta, elbowX, elbowY, wristX, wristY = joints
+            leg.set(wristX, wristY, pX, pY, alpha, beta, elbowX, elbowY, wristX, wristY)
+        self.blitter.update()
+
+
+    """plt.pause(0) runs the GUI event loop with no timeout, late ticks still get a short pause"""
+    def pause(self, interval):
+        self.plt.pause(max(interval, 1e-3))
@@ -1,15 +1,11 @@
+import argparse
+import math
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Slider
 
-fig, ax = plt.subplots()
-fig.subplots_adjust(bottom=0.25)
+from kinematics import clamp_to_reach, ik_batch
+from scheduler import FixedRateScheduler
 
-# Sliders
-axx = plt.axes([0.25, 0.15, 0.65, 0.03])
-axy = plt.axes([0.25, 0.1, 0.65, 0.03])
-x_slider = Slider(axx, "X", 0, 180, valinit=50)
-y_slider = Slider(axy, "Y", 0, 180, valinit=90)
 
 """Arm lengths"""
 arm1, arm2 = 40, 40
@@ -17,7 +13,14 @@ arm1, arm2 = 40, 40
 """Starting pivot"""
 pivotX_init, pivotY = 50, 150
 
-is_animating = [False]
+"""Control rate, plt.pause keeps the GUI responsive while waiting for a deadline"""
+CONTROL_HZ = 100
+
+"""Starting foot, straight below the pivot"""
+FOOT_START = (50, 90)
+
+"""Ticks per swing and per stance, one step takes (30 + 30) / CONTROL_HZ = 0.6 s"""
+SWING_STEPS = STANCE_STEPS = 30
 
 
 """Cyclodial Path for forward Movement"""
@@ -50,84 +53,170 @@ def stance_phase_fixed_foot(foot_pos, pivot_start, pivot_end, steps=25):
     return pivot_x, pivot_y
 
 
-"""Applied Inverse Kinematics"""
-def apply_ik(x, y, pivotX, pivotY):
-    dx, dy = x - pivotX, y - pivotY
-    b = np.hypot(dx, dy)
-    max_dist = arm1 + arm2
-
-    if b > max_dist:
-        x = pivotX + dx * max_dist / b
-        y = pivotY + dy * max_dist / b
-        dx, dy = x - pivotX, y - pivotY
-        b = max_dist
-
-    cos_beta = (b**2 - arm1**2 - arm2**2) / (2 * arm1 * arm2)
-    beta = np.arccos(np.clip(cos_beta, -1, 1))
-    k1 = arm1 + arm2 * np.cos(beta)
-    k2 = arm2 * np.sin(beta)
-    alpha = np.arctan2(dy, dx) - np.arctan2(k2, k1)
-
-    elbowX = pivotX + arm1 * np.cos(alpha)
-    elbowY = pivotY + arm1 * np.sin(alpha)
-    wristX = elbowX + arm2 * np.cos(alpha + beta)
-    wristY = elbowY + arm2 * np.sin(alpha + beta)
-
-    ax.clear()
-    ax.plot([pivotX, elbowX], [pivotY, elbowY], 'ro-', linewidth=4, label='Arm')
-    ax.plot([elbowX, wristX], [elbowY, wristY], 'ro-', linewidth=4)
-    ax.plot(x, y, 'gx', markersize=10, label='Foot')
-    ax.text(0, 180, f"x: {x:.2f}, y: {y:.2f}\nα: {np.rad2deg(alpha):.1f}, β: {np.rad2deg(beta):.1f}")
-    ax.axhline(90, color='gray', linestyle='--')
-    ax.set_xlim(0, 200)
-    ax.set_ylim(0, 200)
-    ax.set_aspect('equal')
-    ax.legend()
-    fig.canvas.draw_idle()
-
-
-"""Updating Sliders"""
-def update(val):
-    x = x_slider.val
-    y = y_slider.val
-    apply_ik(x, y, pivotX_init, pivotY)
-
-
-"""Updating the plot"""
-def drawww(start_foot, end_foot, pivot_start, pivot_end):
-    if is_animating[0]:
-        return
-    is_animating[0] = True
-
-
-    """Swing"""
-    swing_x, swing_y = cycloidal_between(start_foot, end_foot, steps=30)
-    for x, y in zip(swing_x, swing_y):
-        x_slider.set_val(x)
-        y_slider.set_val(y)
-        apply_ik(x, y, pivot_start[0], pivot_start[1])
-        plt.pause(0.01)
-
-    """Stance"""
-    stance_pivot_x, stance_pivot_y = stance_phase_fixed_foot(end_foot, pivot_start, pivot_end, steps=30)
-    for px, py in zip(stance_pivot_x, stance_pivot_y):
-        x_slider.set_val(end_foot[0])
-        y_slider.set_val(end_foot[1])
-        apply_ik(end_foot[0], end_foot[1], px, py)
-        plt.pause(0.01)
-
-    is_animating[0] = False
-
-x_slider.on_changed(update)
-y_slider.on_changed(update)
-update(None)
-
-footsteps = [(50, 90), (70, 90), (90, 90), (110, 90)]
-pivot_positions = [(50, 150), (70, 150), (90, 150), (110, 150)]
-
-
-while(1):
-    for i in range(len(footsteps) - 1):
-        drawww(footsteps[i], footsteps[i+1], pivot_positions[i], pivot_positions[i+1])
-
-plt.show()
+class FootstepPlanner:
+    """Endless footsteps towards a commanded velocity and heading.
+
+    Only the current foot and pivot are kept, so a walk of any length takes
+    the same memory. Each step is planned from the command at the time it
+    starts, so command() takes effect on the next step. velocity is in
+    units per second and heading in radians in the plane of the leg, 0
+    walks towards +x, pi backwards and anything in between up or down a
+    slope. Steps are capped at max_step so the foot stays in reach.
+    """
+
+    def __init__(self, foot=FOOT_START, pivot=(pivotX_init, pivotY), velocity=100 / 3, heading=0.0,
+                 swing_steps=SWING_STEPS, stance_steps=STANCE_STEPS, rate=CONTROL_HZ, max_step=40):
+        self.foot = tuple(float(v) for v in foot)
+        self.pivot = tuple(float(v) for v in pivot)
+        self.swing_steps, self.stance_steps = swing_steps, stance_steps
+        self.rate = rate
+        self.max_step = max_step
+        self.steps = 0
+        self.command(velocity, heading)
+
+    def command(self, velocity, heading=None):
+        self.velocity = float(velocity)
+        if heading is not None:
+            self.heading = float(heading)
+
+    """Distance the foot and the pivot cover in one swing and stance"""
+    @property
+    def step_length(self):
+        period = (self.swing_steps + self.stance_steps) / self.rate
+        return min(abs(self.velocity) * period, self.max_step)
+
+
+    """Planning the next step, (start_foot, end_foot, pivot_start, pivot_end)"""
+    def next_step(self):
+        direction = math.copysign(1.0, self.velocity)
+        dx = direction * self.step_length * math.cos(self.heading)
+        dy = direction * self.step_length * math.sin(self.heading)
+
+        start_foot, pivot_start = self.foot, self.pivot
+        self.foot = (start_foot[0] + dx, start_foot[1] + dy)
+        self.pivot = (pivot_start[0] + dx, pivot_start[1] + dy)
+        self.steps += 1
+        return start_foot, self.foot, pivot_start, self.pivot
+
+    def __iter__(self):
+        while True:
+            yield self.next_step()
+
+
+    """Foot and pivot on every tick, (x, y, pivotX, pivotY, levelY), swing then stance of each step.
+    levelY is the pivot's height without the stance bob, for a view following the walk"""
+    def ticks(self):
+        for start_foot, end_foot, pivot_start, pivot_end in self:
+            swing_x, swing_y = cycloidal_between(start_foot, end_foot, steps=self.swing_steps)
+            for x, y in zip(swing_x, swing_y):
+                yield x, y, pivot_start[0], pivot_start[1], pivot_start[1]
+
+            stance_x, stance_y = stance_phase_fixed_foot(end_foot, pivot_start, pivot_end, steps=self.stance_steps)
+            level_y = np.linspace(pivot_start[1], pivot_end[1], self.stance_steps)
+            for pX, pY, levelY in zip(stance_x, stance_y, level_y):
+                yield end_foot[0], end_foot[1], pX, pY, levelY
+
+
+class PivotChangeDemo:
+    """Slider figure walking one leg while its pivot moves.
+
+    matplotlib is only imported when the demo is created, so the path
+    functions above can be used with NumPy alone. The up and down keys
+    change the walking speed and left and right the heading, from the next
+    step on.
+    """
+
+    def __init__(self, planner=None):
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Slider
+
+        self.plt = plt
+        self.fig, self.ax = plt.subplots()
+        self.fig.subplots_adjust(bottom=0.25)
+
+        # Sliders
+        axx = plt.axes([0.25, 0.15, 0.65, 0.03])
+        axy = plt.axes([0.25, 0.1, 0.65, 0.03])
+        self.x_slider = Slider(axx, "X", 0, 180, valinit=50)
+        self.y_slider = Slider(axy, "Y", 0, 180, valinit=90)
+
+        self.planner = FootstepPlanner() if planner is None else planner
+        # Sliders and view follow the walk, the sliders show the foot as if the pivot had not moved
+        self.shift, self.rise = 0.0, 0.0
+        # plt.pause(0) would run the event loop with no timeout
+        self.scheduler = FixedRateScheduler(CONTROL_HZ, sleep=lambda interval: plt.pause(max(interval, 1e-3)))
+
+        self.x_slider.on_changed(self.update)
+        self.y_slider.on_changed(self.update)
+        self.fig.canvas.mpl_connect("key_press_event", self.on_key)
+        self.update(None)
+
+
+    """Applied Inverse Kinematics"""
+    def apply_ik(self, x, y, pivotX, pivotY):
+        x, y, *_ = clamp_to_reach(x, y, pivotX, pivotY, arm1, arm2)
+        alpha, beta, elbowX, elbowY, wristX, wristY = ik_batch(x, y, pivotX, pivotY, arm1, arm2)
+
+        ax = self.ax
+        ax.clear()
+        ax.plot([pivotX, elbowX], [pivotY, elbowY], 'ro-', linewidth=4, label='Arm')
+        ax.plot([elbowX, wristX], [elbowY, wristY], 'ro-', linewidth=4)
+        ax.plot(x, y, 'gx', markersize=10, label='Foot')
+        ax.text(self.shift, self.rise + 180, f"x: {x:.2f}, y: {y:.2f}\nα: {np.rad2deg(alpha):.1f}, β: {np.rad2deg(beta):.1f}")
+        ax.axhline(self.rise + 90, color='gray', linestyle='--')
+        ax.set_xlim(self.shift, self.shift + 200)
+        ax.set_ylim(self.rise, self.rise + 200)
+        ax.set_aspect('equal')
+        ax.legend()
+        self.fig.canvas.draw_idle()
+
+
+    """Updating Sliders"""
+    def update(self, val):
+        x = self.x_slider.val
+        y = self.y_slider.val
+        self.apply_ik(x + self.shift, y + self.rise, pivotX_init + self.shift, pivotY + self.rise)
+
+
+    """Arrow keys command the planner, 5 units/s and 5 degrees a press"""
+    def on_key(self, event):
+        planner = self.planner
+        if event.key in ("up", "down"):
+            planner.command(planner.velocity + (5 if event.key == "up" else -5))
+        elif event.key in ("left", "right"):
+            planner.command(planner.velocity, planner.heading + math.radians(5 if event.key == "left" else -5))
+
+
+    """Moving the view with the pivot"""
+    def follow(self, x, y):
+        self.shift, self.rise = x - pivotX_init, y - pivotY
+
+
+    """Updating the plot"""
+    def drawww(self, x, y, pivotX, pivotY, levelY):
+        # Following the pivot without its bob, so the view does not bob along
+        self.follow(pivotX, levelY)
+        self.x_slider.set_val(x - self.shift)
+        self.y_slider.set_val(y - self.rise)
+        self.apply_ik(x, y, pivotX, pivotY)
+
+
+    """Walking for as long as the window is open, each step planned as it starts"""
+    def run(self):
+        ticks = self.planner.ticks()
+        self.scheduler.start()
+        while self.plt.fignum_exists(self.fig.number):
+            self.drawww(*next(ticks))
+            # Late ticks skip ahead along the path, like the gait loops
+            for _ in range(self.scheduler.wait() - 1):
+                next(ticks)
+
+
+"""python walking_with_pivot_change.py --velocity 40 --heading 10"""
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One leg walking with its pivot, steered with the arrow keys")
+    parser.add_argument("--velocity", type=float, default=100 / 3, help="walking speed in units per second")
+    parser.add_argument("--heading", type=float, default=0.0, help="degrees, 0 walks towards +x")
+    args = parser.parse_args()
+
+    PivotChangeDemo(FootstepPlanner(velocity=args.velocity, heading=math.radians(args.heading))).run()
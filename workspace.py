@@ -0,0 +1,127 @@
+import os
+import sys
+
+import numpy as np
+
+from kinematics import ik_batch
+
+
+"""Workspace maps are cached here, one .npz per arm lengths, resolution and elbow"""
+CACHE_DIR = os.environ.get("LEG_WORKSPACE_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "leg_workspace"))
+
+_loaded = {}
+
+
+"""Cache file name, keyed by everything the grids depend on"""
+def workspace_key(arm1, arm2, resolution=1.0, elbow=1):
+    return f"workspace_{float(arm1):g}x{float(arm2):g}_r{float(resolution):g}_e{elbow}.npz"
+
+
+class WorkspaceMap:
+    """Reachability and joint angles of one leg geometry over a grid around the pivot.
+
+    The grid is in pivot coordinates, so one map serves every pivot position
+    of the same arm lengths. Per cell it holds the clearance, the distance
+    from the target to the nearest edge of the annulus |arm1 - arm2| <= b <=
+    arm1 + arm2, which is where the leg is fully folded or fully extended
+    and the Jacobian is singular, negative outside. It also holds beta and
+    alpha as cos/sin, so interpolation does not break where atan2 wraps.
+    Lookups are bilinear: four cells per query whatever the grid size, and
+    no IK.
+    """
+
+    FIELDS = ("clearance", "beta", "cos_alpha", "sin_alpha")
+
+    def __init__(self, arm1, arm2, resolution=1.0, elbow=1, grids=None):
+        self.arm1, self.arm2 = float(arm1), float(arm2)
+        self.resolution = float(resolution)
+        self.elbow = elbow
+        self.reach = self.arm1 + self.arm2
+        self.size = int(np.ceil(self.reach / self.resolution)) + 1
+        self.origin = -self.size * self.resolution
+        self.coordinates = self.origin + np.arange(2 * self.size + 1) * self.resolution
+
+        if grids is None:
+            grids = self.build()
+        for name in self.FIELDS:
+            setattr(self, name, grids[name])
+
+    def build(self):
+        x, y = np.meshgrid(self.coordinates, self.coordinates)
+        b = np.hypot(x, y)
+        alpha, beta = ik_batch(x, y, 0.0, 0.0, self.arm1, self.arm2, self.elbow)[:2]
+        return {
+            "clearance": np.minimum(self.reach - b, b - abs(self.arm1 - self.arm2)),
+            "beta": beta,
+            "cos_alpha": np.cos(alpha),
+            "sin_alpha": np.sin(alpha),
+        }
+
+    def key(self):
+        return workspace_key(self.arm1, self.arm2, self.resolution, self.elbow)
+
+
+    """Map of a geometry from memory, the disk cache, or built and saved on first use"""
+    @classmethod
+    def load(cls, arm1, arm2, resolution=1.0, elbow=1, cache_dir=CACHE_DIR):
+        key = workspace_key(arm1, arm2, resolution, elbow)
+        path = None if cache_dir is None else os.path.join(cache_dir, key)
+        if (path or key) in _loaded:
+            return _loaded[path or key]
+
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                workspace = cls(arm1, arm2, resolution, elbow, grids={name: data[name] for name in cls.FIELDS})
+        else:
+            workspace = cls(arm1, arm2, resolution, elbow)
+            if path is not None:
+                workspace.save(path)
+        _loaded[path or key] = workspace
+        return workspace
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Written under a temporary name first so a reader never sees half a file
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary, **{name: getattr(self, name) for name in self.FIELDS})
+        os.replace(temporary, path)
+
+
+    def _bilinear(self, grid, i, j, u, v):
+        return ((1 - u) * (1 - v) * grid[j, i] + u * (1 - v) * grid[j, i + 1]
+                + (1 - u) * v * grid[j + 1, i] + u * v * grid[j + 1, i + 1])
+
+    def _cells(self, x, y, pX, pY):
+        gx = (np.asarray(x, dtype=float) - pX - self.origin) / self.resolution
+        gy = (np.asarray(y, dtype=float) - pY - self.origin) / self.resolution
+        last = len(self.coordinates) - 2
+        i = np.clip(np.floor(gx).astype(int), 0, last)
+        j = np.clip(np.floor(gy).astype(int), 0, last)
+        return i, j, np.clip(gx - i, 0, 1), np.clip(gy - j, 0, 1)
+
+    """Interpolated clearance, alpha and beta at targets, pX, pY is the pivot"""
+    def lookup(self, x, y, pX=0.0, pY=0.0):
+        cells = self._cells(x, y, pX, pY)
+        clearance = self._bilinear(self.clearance, *cells)
+        beta = self._bilinear(self.beta, *cells)
+        alpha = np.arctan2(self._bilinear(self.sin_alpha, *cells), self._bilinear(self.cos_alpha, *cells))
+        return clearance, alpha, beta
+
+    """Which targets the leg reaches with at least margin to spare, without running IK"""
+    def is_reachable(self, x, y, pX=0.0, pY=0.0, margin=0.0):
+        return self._bilinear(self.clearance, *self._cells(x, y, pX, pY)) >= margin
+
+    """[xmin, xmax, ymin, ymax] of the grid around a pivot, as imshow takes it"""
+    def extent(self, pX=0.0, pY=0.0):
+        low, high = self.coordinates[0], self.coordinates[-1]
+        return [pX + low, pX + high, pY + low, pY + high]
+
+
+"""python workspace.py arm1 arm2 [resolution], builds and caches a map"""
+if __name__ == "__main__":
+    arm1, arm2 = float(sys.argv[1]), float(sys.argv[2])
+    resolution = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    workspace = WorkspaceMap.load(arm1, arm2, resolution)
+    reachable = (workspace.clearance >= 0).mean()
+    print(f"{os.path.join(CACHE_DIR, workspace.key())}: {workspace.clearance.shape[1]}x{workspace.clearance.shape[0]} "
+          f"cells, {reachable:.0%} reachable")